@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Benchmark job parsers against the recorded JobDetail corpus.
+
+Measures pages/s and allocations per parser class, compares throughput with
+the recorded baseline and checks the produced Job dicts against snapshots.
+Exits non-zero on a throughput or peak memory regression, or a snapshot
+mismatch.
+
+Throughput is compared as a ratio to a reference parse (a bare lxml
+BeautifulSoup tree of the same pages) timed in alternating rounds, so the
+baseline carries over between machines and Python builds.
+"""
+
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from bs4 import BeautifulSoup
+
+from avature_scraper.models import Job
+from avature_scraper.parsers import get_parser
+from avature_scraper.transform import DescriptionTransformer
+
+BENCH_DIR = Path(__file__).resolve().parent.parent / "benchmarks"
+CORPUS_DIR = BENCH_DIR / "corpus"
+SNAPSHOT_DIR = BENCH_DIR / "snapshots"
+THRESHOLDS_PATH = BENCH_DIR / "thresholds.json"
+ROUNDS = 5  # Best-of rounds to damp scheduler noise
+ROUND_DURATION = 0.4  # Seconds of parsing per round
+
+
+def load_corpus(corpus_dir: Path) -> dict[str, list[tuple[str, str, str]]]:
+    """Load corpus pages grouped by domain as (name, url, html) tuples."""
+    with open(corpus_dir / "index.json", "r", encoding="utf-8") as f:
+        index = json.load(f)
+
+    corpus: dict[str, list[tuple[str, str, str]]] = {}
+    for name, url in sorted(index.items()):
+        html = (corpus_dir / name).read_text(encoding="utf-8")
+        corpus.setdefault(urlparse(url).netloc, []).append((name, url, html))
+    return corpus
+
+
+def parse_page(url: str, html: str, domain: str) -> dict | None:
+    job = get_parser(domain).parse(html, url, None, domain)
+    return job.to_dict() if job else None
+
+
+def reference_parse(url: str, html: str, domain: str) -> None:
+    """Build and discard the tree every parser starts from."""
+    BeautifulSoup(html, "lxml").decompose()
+
+
+def timed_round(pages: list[tuple[str, str, str, str]], parse) -> float:
+    """Parse the pages repeatedly for ROUND_DURATION; return pages/s."""
+    parsed = 0
+    start = time.process_time()
+    while True:
+        for _, url, html, domain in pages:
+            parse(url, html, domain)
+        parsed += len(pages)
+        elapsed = time.process_time() - start
+        if elapsed >= ROUND_DURATION:
+            return parsed / elapsed
+
+
+def measure_throughput(pages: list[tuple[str, str, str, str]]) -> tuple[float, float]:
+    """
+    Return the best pages/s over ROUNDS and the median ratio to the reference.
+
+    Reference and parser rounds alternate, so each ratio compares rounds run
+    under the same machine load.
+    """
+    for _, url, html, domain in pages:
+        parse_page(url, html, domain)  # Warm up selectors and caches
+
+    rates, ratios = [], []
+    for _ in range(ROUNDS):
+        reference = timed_round(pages, reference_parse)
+        rates.append(timed_round(pages, parse_page))
+        ratios.append(rates[-1] / reference)
+    return max(rates), statistics.median(ratios)
+
+
+def measure_allocations(pages: list[tuple[str, str, str, str]]) -> tuple[float, int]:
+    """Return (average peak KiB per page, allocated blocks per page)."""
+    peaks = 0
+    blocks = 0
+    tracemalloc.start()
+    try:
+        for _, url, html, domain in pages:
+            gc.collect()
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            parse_page(url, html, domain)
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            peaks += peak
+            blocks += sum(
+                stat.count_diff
+                for stat in after.compare_to(before, "filename")
+                if stat.count_diff > 0
+            )
+    finally:
+        tracemalloc.stop()
+
+    return peaks / 1024 / len(pages), blocks // len(pages)
+
+
+def group_by_parser(corpus: dict) -> dict[str, list[tuple[str, str, str, str]]]:
+    groups: dict[str, list[tuple[str, str, str, str]]] = {}
+    for domain, pages in corpus.items():
+        parser_name = type(get_parser(domain)).__name__
+        for name, url, html in pages:
+            groups.setdefault(parser_name, []).append((name, url, html, domain))
+    return groups
+
+
+def check_snapshots(corpus: dict, update: bool) -> int:
+    """Compare parsed Job dicts against snapshots. Returns mismatch count."""
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    mismatches = 0
+
+    for domain, pages in corpus.items():
+        results = {name: parse_page(url, html, domain) for name, url, html in pages}
+        snapshot_path = SNAPSHOT_DIR / f"{domain}.json"
+
+        if update or not snapshot_path.exists():
+            with open(snapshot_path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2, ensure_ascii=False)
+                f.write("\n")
+            continue
+
+        with open(snapshot_path, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+
+        for name, job in results.items():
+            if expected.get(name) != job:
+                print(f"  ✗ Snapshot mismatch: {name}")
+                mismatches += 1
+
+    return mismatches
+
+
+def run(update: bool) -> int:
+    corpus = load_corpus(CORPUS_DIR)
+    thresholds = {"max_regression": 0.35, "max_peak_growth": 0.15, "parsers": {}}
+    if THRESHOLDS_PATH.exists():
+        with open(THRESHOLDS_PATH, "r", encoding="utf-8") as f:
+            thresholds = json.load(f)
+    max_regression = thresholds["max_regression"]
+    max_peak_growth = thresholds.get("max_peak_growth", 0.15)
+
+    print(
+        f"{'Parser':<24} {'Pages':>5} {'Pages/s':>9} {'Relative':>9} "
+        f"{'Baseline':>9} {'Peak KiB':>9} {'Blocks':>7}"
+    )
+    failures = 0
+    for parser_name, pages in sorted(group_by_parser(corpus).items()):
+        rate, relative = measure_throughput(pages)
+        peak_kib, blocks = measure_allocations(pages)
+        recorded = thresholds["parsers"].get(parser_name, {})
+        baseline = recorded.get("relative_speed")
+        baseline_peak = recorded.get("peak_kib_per_page")
+
+        status = ""
+        if update:
+            thresholds["parsers"][parser_name] = {
+                "relative_speed": round(relative, 3),
+                "peak_kib_per_page": round(peak_kib, 1),
+            }
+        else:
+            if baseline and relative < baseline * (1 - max_regression):
+                status += f"  ✗ regressed {(1 - relative / baseline) * 100:.0f}%"
+            if baseline_peak and peak_kib > baseline_peak * (1 + max_peak_growth):
+                status += (
+                    f"  ✗ peak memory +{(peak_kib / baseline_peak - 1) * 100:.0f}%"
+                )
+            failures += bool(status)
+
+        baseline_str = f"{baseline:.3f}" if baseline else "-"
+        print(
+            f"{parser_name:<24} {len(pages):>5} {rate:>9.1f} {relative:>9.3f} "
+            f"{baseline_str:>9} {peak_kib:>9.1f} {blocks:>7}{status}"
+        )
+
+    if update:
+        with open(THRESHOLDS_PATH, "w", encoding="utf-8") as f:
+            json.dump(thresholds, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {THRESHOLDS_PATH}")
+
+    mismatches = check_snapshots(corpus, update)
+    if mismatches:
+        print(f"\n{mismatches} snapshot mismatch(es)")
+    if failures:
+        print(
+            f"\n{failures} parser(s) regressed: throughput more than "
+            f"{max_regression:.0%} or peak memory more than {max_peak_growth:.0%}"
+        )
+
+    return 1 if failures or mismatches else 0
+
+
+def bench_transform() -> int:
+    """Report description size reduction and CPU cost of the transform stage."""
+    corpus = load_corpus(CORPUS_DIR)
+    transformer = DescriptionTransformer(formats=("text", "markdown"))
+
+    print(
+        f"{'Domain':<28} {'HTML':>8} {'Minified':>9} {'Saved':>6} "
+        f"{'Text':>7} {'Markdown':>9} {'ms/page':>8}"
+    )
+    totals = [0, 0]
+    for domain, pages in corpus.items():
+        jobs = [
+            Job(**job)
+            for _, url, html in pages
+            if (job := parse_page(url, html, domain))
+        ]
+        if not jobs:
+            continue
+
+        results = [transformer.transform(job) for job in jobs]
+        start = time.process_time()
+        rounds = 0
+        while time.process_time() - start < ROUND_DURATION:
+            for job in jobs:
+                transformer.transform(job)
+            rounds += 1
+        cpu_ms = (time.process_time() - start) * 1000 / (rounds * len(jobs))
+
+        before = sum(len(job.description.encode("utf-8")) for job in jobs)
+        after = sum(len(job.description.encode("utf-8")) for job in results)
+        text = sum(len(job.description_text.encode("utf-8")) for job in results)
+        markdown = sum(len(job.description_markdown.encode("utf-8")) for job in results)
+        totals[0] += before
+        totals[1] += after
+        print(
+            f"{domain:<28} {before:>8} {after:>9} {1 - after / before:>6.0%} "
+            f"{text:>7} {markdown:>9} {cpu_ms:>8.2f}"
+        )
+
+    print(
+        f"\nDescription bytes: {totals[0]} -> {totals[1]} "
+        f"({1 - totals[1] / totals[0]:.0%} smaller)"
+    )
+    return 0
+
+
+def record(urls_path: Path) -> int:
+    """Download JobDetail pages listed in a file into the corpus."""
+    import requests
+
+    from avature_scraper.scraper import AvatureScraper
+
+    session = requests.Session()
+    session.headers.update(AvatureScraper.DEFAULT_HEADERS)
+
+    index_path = CORPUS_DIR / "index.json"
+    index = {}
+    if index_path.exists():
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+
+    with open(urls_path, "r", encoding="utf-8") as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    for url in urls:
+        domain = urlparse(url).netloc
+        name = f"{domain}/{url.rstrip('/').rsplit('/', 1)[-1]}.html"
+        try:
+            response = session.get(url, timeout=30, allow_redirects=False)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"  ✗ {url}: {e}")
+            continue
+
+        (CORPUS_DIR / domain).mkdir(parents=True, exist_ok=True)
+        (CORPUS_DIR / name).write_text(response.text, encoding="utf-8")
+        index[name] = url
+        print(f"  ✓ {name}")
+        time.sleep(1.5)
+
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(index.items())), f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark job parsers")
+    parser.add_argument(
+        "action",
+        choices=["run", "update", "record", "transform"],
+        nargs="?",
+        default="run",
+        help="run: check against baseline, update: rewrite baseline and snapshots, "
+        "record: download pages into the corpus, "
+        "transform: measure description minification",
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        type=Path,
+        help="File with JobDetail URLs to record (record only)",
+    )
+
+    args = parser.parse_args()
+
+    if args.action == "record":
+        if not args.input:
+            parser.error("record requires --input")
+        sys.exit(record(args.input))
+    if args.action == "transform":
+        sys.exit(bench_transform())
+    sys.exit(run(update=args.action == "update"))
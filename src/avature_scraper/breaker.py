@@ -0,0 +1,145 @@
+import time
+from collections import deque
+
+from .progress import emit
+from .quality import PARSE_ERROR
+
+BREAKER_ERROR_RATE = 0.5  # Share of recent requests failing that opens the breaker
+BREAKER_STREAK = 5  # Consecutive failures that open the breaker
+BREAKER_WINDOW = 20  # Recent outcomes per host the error rate is measured over
+BREAKER_MIN_OUTCOMES = 10  # Outcomes needed before the error rate counts
+BREAKER_COOLDOWN = 30  # Seconds open before a probe; doubles per failed probe
+BREAKER_MAX_COOLDOWN = 240
+BREAKER_MAX_PROBES = 3  # Failed probes in a row before the host is given up
+BREAKER_POLL_INTERVAL = 0.5  # Re-check delay while a probe is in flight
+CIRCUIT_OPEN = "circuit open"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+def is_host_failure(error: str | None) -> bool:
+    """Timeouts, connection errors, 5xx responses and unparseable pages."""
+    if error is None:
+        return False
+    if error.isdigit():
+        return int(error) >= 500
+    return error in ("timeout", "connection error", PARSE_ERROR)
+
+
+class CircuitBreaker:
+    """
+    Failure circuit breaker for one host.
+
+    closed -> open after `streak` consecutive failures, or when `error_rate`
+    of the last BREAKER_WINDOW outcomes failed (0 disables either trigger).
+    While open the host gets no requests, so its URLs wait without using up
+    retries or worker slots. After the cooldown a single probe is let
+    through (half-open): success closes the breaker, failure opens it again
+    with a doubled cooldown. After BREAKER_MAX_PROBES failed probes in a
+    row the host is given up and its remaining URLs fail fast.
+
+    Other errors (404, redirects, rate limits) count as the host answering.
+    Used from the dispatcher thread only, so it needs no lock.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        error_rate: float = BREAKER_ERROR_RATE,
+        streak: int = BREAKER_STREAK,
+    ):
+        self.host = host
+        self.error_rate = error_rate
+        self.streak = streak
+        self.state = CLOSED
+        self.cooldown = BREAKER_COOLDOWN
+        self.open_until = 0.0
+        self.failed_probes = 0
+        self.trips = 0
+        self._failures = 0
+        self._recent: deque[bool] = deque(maxlen=BREAKER_WINDOW)
+        self._probing = False
+
+    @property
+    def given_up(self) -> bool:
+        return self.failed_probes >= BREAKER_MAX_PROBES
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until this host may get another request (0 if now)."""
+        if self.given_up:
+            return 0.0  # Its URLs are dropped; don't hold back the site's others
+        if self.state == OPEN:
+            return max(0.0, self.open_until - now)
+        if self.state == HALF_OPEN and self._probing:
+            return BREAKER_POLL_INTERVAL
+        return 0.0
+
+    def dispatched(self, now: float) -> bool:
+        """Note a request to the host; returns True if it is the probe."""
+        if self.state == OPEN and now >= self.open_until:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record(self, error: str | None, probe: bool = False) -> None:
+        """Advance the state machine with a request's outcome (error None: ok)."""
+        failure = is_host_failure(error)
+        if probe:
+            self._probing = False
+            if failure:
+                self.failed_probes += 1
+                self.cooldown = min(self.cooldown * 2, BREAKER_MAX_COOLDOWN)
+                self._open(f"probe failed ({error})")
+            else:
+                self._close()
+            return
+        if self.state != CLOSED:
+            return  # Sent before the breaker opened
+
+        self._recent.append(failure)
+        self._failures = self._failures + 1 if failure else 0
+        if self.streak and self._failures >= self.streak:
+            self._open(f"{self._failures} failures in a row (last: {error})")
+        elif self.error_rate and len(self._recent) >= BREAKER_MIN_OUTCOMES:
+            rate = sum(self._recent) / len(self._recent)
+            if rate >= self.error_rate:
+                self._open(
+                    f"{rate:.0%} of the last {len(self._recent)} requests failed"
+                )
+
+    def _open(self, reason: str) -> None:
+        self.state = OPEN
+        self.trips += 1
+        self.open_until = time.monotonic() + self.cooldown
+        if self.given_up:
+            emit(
+                f"  Circuit open on {self.host}: {reason}; giving up on its "
+                "remaining URLs",
+                level="warning",
+                host=self.host,
+                reason=reason,
+            )
+            return
+        emit(
+            f"  Circuit open on {self.host}: {reason}; probing in {self.cooldown:.0f}s",
+            level="warning",
+            host=self.host,
+            reason=reason,
+            cooldown_s=self.cooldown,
+        )
+
+    def _close(self) -> None:
+        emit(
+            f"  Circuit closed on {self.host}: probe succeeded",
+            level="warning",
+            host=self.host,
+        )
+        self.state = CLOSED
+        self.cooldown = BREAKER_COOLDOWN
+        self.failed_probes = 0
+        self._failures = 0
+        self._recent.clear()
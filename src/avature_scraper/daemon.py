@@ -0,0 +1,287 @@
+import json
+import signal
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+from .dead_letter import DeadLetterWriter
+from .dedup import job_key
+from .http import connection_stats
+from .index import JobIndex
+from .progress import emit
+from .scraper import AvatureScraper, _write_job, default_dead_letter_path
+
+DEFAULT_INTERVAL = 6 * 3600  # First refresh cadence for a new site
+MIN_INTERVAL = 3600
+MAX_INTERVAL = 24 * 3600
+SPEEDUP = 0.5  # Interval factor after a refresh that found changes
+SLOWDOWN = 1.5  # Interval factor after a refresh with no changes
+ERROR_RETRY = 900  # Seconds before retrying a site whose refresh failed
+
+
+@dataclass
+class SiteState:
+    url: str
+    interval: float = DEFAULT_INTERVAL
+    next_run: float = 0.0
+    last_run: float | None = None
+    jobs: int = 0
+    last_new: int = 0
+    last_removed: int = 0
+    new_total: int = 0
+    removed_total: int = 0
+    refreshes: int = 0
+    errors: int = 0
+    last_error: str | None = None
+    # Canonical job key -> JobDetail URL of every job already written
+    known: dict[str, str] = field(default_factory=dict)
+
+    def status(self) -> dict:
+        data = asdict(self)
+        del data["known"]
+        return data
+
+
+class RefreshDaemon:
+    """
+    Keeps sites fresh with incremental refreshes on a per-site cadence.
+
+    Each refresh diffs the sitemap against the jobs already written and
+    only fetches new JobDetail pages. A site's interval halves after a
+    refresh that found changes and grows by half after one that didn't,
+    within [min_interval, max_interval], so busy portals are polled more
+    often than quiet ones. One scraper (and its connections and resolved
+    redirects) is reused across refreshes; state survives restarts via a
+    JSON file.
+    """
+
+    def __init__(
+        self,
+        scraper: AvatureScraper,
+        urls: list[str],
+        output_path: str | Path,
+        state_path: str | Path,
+        index_path: str | Path | None = None,
+        min_interval: float = MIN_INTERVAL,
+        max_interval: float = MAX_INTERVAL,
+    ):
+        self.scraper = scraper
+        self.output_path = Path(output_path)
+        self.state_path = Path(state_path)
+        self.index_path = index_path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.started_at = time.time()
+        self.jobs_written = 0
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.sites = self._load_state(urls)
+
+    def run(self) -> None:
+        """Refresh sites as they come due until stop() is called."""
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        with (
+            open(self.output_path, "a", encoding="utf-8") as output,
+            DeadLetterWriter(
+                default_dead_letter_path(self.output_path), mode="a"
+            ) as dead_letters,
+        ):
+            index = JobIndex(self.index_path) if self.index_path else None
+            try:
+                while not self._stop.is_set():
+                    site = min(self.sites.values(), key=lambda s: s.next_run)
+                    if self._stop.wait(max(0.0, site.next_run - time.time())):
+                        break
+                    self.refresh(site, output, dead_letters, index)
+                    self._save_state()
+            finally:
+                if index:
+                    index.close()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def refresh(self, site: SiteState, output, dead_letters, index=None) -> None:
+        base_url = site.url.rstrip("/")
+        emit(f"\nRefreshing: {site.url}", site=site.url)
+        sitemap = self.scraper._get_sitemap_parser()
+        try:
+            final_url = sitemap.resolve(base_url)
+            groups = sitemap.fetch_groups(final_url)
+        except (requests.RequestException, RuntimeError) as e:
+            # The portal may have moved; follow its redirect again next time
+            sitemap.forget(base_url)
+            with self._lock:
+                site.errors += 1
+                site.last_error = str(e)
+                site.next_run = time.time() + ERROR_RETRY
+            emit(f"  Refresh failed: {e}", level="warning", site=site.url)
+            return
+
+        current = {job_key(group[0]) or group[0]: group[0] for group in groups}
+        new_urls = [url for key, url in current.items() if key not in site.known]
+        removed = [key for key in site.known if key not in current]
+
+        written = 0
+        self.scraper.progress.start()
+        try:
+            # base_url, not final_url: source_site is the input URL's host, as
+            # in a one-off run
+            for job in self.scraper.iter_job_urls(base_url, new_urls, dead_letters):
+                _write_job(output, job)
+                if index:
+                    index.upsert(job)
+                with self._lock:
+                    key = job_key(job.apply_url) or job.apply_url
+                    site.known[key] = job.apply_url
+                written += 1
+        finally:
+            self.scraper.progress.stop()
+        output.flush()
+
+        if index and removed:
+            index.remove([site.known[key] for key in removed])
+            index.commit()
+
+        with self._lock:
+            for key in removed:
+                del site.known[key]
+            changed = written or removed
+            factor = SPEEDUP if changed else SLOWDOWN
+            site.interval = min(
+                self.max_interval, max(self.min_interval, site.interval * factor)
+            )
+            site.last_run = time.time()
+            site.next_run = site.last_run + site.interval
+            site.jobs = len(current)
+            site.last_new = written
+            site.last_removed = len(removed)
+            site.new_total += written
+            site.removed_total += len(removed)
+            site.refreshes += 1
+            site.last_error = None
+            self.jobs_written += written
+
+        emit(
+            f"  {written} new, {len(removed)} removed of {len(current)} jobs; "
+            f"next refresh in {site.interval / 3600:.1f}h",
+            site=site.url,
+            new=written,
+            removed=len(removed),
+            jobs=len(current),
+            interval_s=site.interval,
+        )
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "jobs_written": self.jobs_written,
+                "sites": [site.status() for site in self.sites.values()],
+            }
+
+    def metrics(self) -> str:
+        """Status in the Prometheus text exposition format."""
+        lines = [
+            f"avature_uptime_seconds {time.time() - self.started_at:.0f}",
+            f"avature_jobs_written_total {self.jobs_written}",
+            f"avature_http_requests_total {connection_stats.requests}",
+        ]
+        for host, (opened, seconds) in connection_stats.per_host().items():
+            lines.append(f'avature_http_connections_total{{host="{host}"}} {opened}')
+            lines.append(
+                f'avature_http_connect_seconds_total{{host="{host}"}} {seconds}'
+            )
+        series = {
+            "avature_site_jobs": "jobs",
+            "avature_site_refresh_interval_seconds": "interval",
+            "avature_site_last_refresh_timestamp_seconds": "last_run",
+            "avature_site_new_jobs_total": "new_total",
+            "avature_site_removed_jobs_total": "removed_total",
+            "avature_site_refreshes_total": "refreshes",
+            "avature_site_refresh_errors_total": "errors",
+        }
+        with self._lock:
+            for name, attr in series.items():
+                for site in self.sites.values():
+                    value = getattr(site, attr)
+                    if value is not None:
+                        lines.append(f'{name}{{site="{site.url}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def _load_state(self, urls: list[str]) -> dict[str, SiteState]:
+        saved = {}
+        if self.state_path.exists():
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        # Sites removed from the sites file are dropped from the state
+        return {
+            url: SiteState(**saved[url]) if url in saved else SiteState(url)
+            for url in urls
+        }
+
+    def _save_state(self) -> None:
+        with self._lock:
+            data = {url: asdict(site) for url, site in self.sites.items()}
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        tmp.replace(self.state_path)
+
+
+def start_status_server(daemon: RefreshDaemon, port: int) -> ThreadingHTTPServer:
+    """Serve /status (JSON) and /metrics (Prometheus) on localhost."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/status":
+                body = json.dumps(daemon.status(), indent=2)
+                content_type = "application/json"
+            elif self.path == "/metrics":
+                body = daemon.metrics()
+                content_type = "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve(
+    scraper: AvatureScraper,
+    urls: list[str],
+    output_path: str | Path,
+    state_path: str | Path,
+    port: int,
+    **options,
+) -> None:
+    """Run the refresh daemon with its status server until SIGINT/SIGTERM."""
+    daemon = RefreshDaemon(scraper, urls, output_path, state_path, **options)
+    server = start_status_server(daemon, port)
+    emit(f"Status on http://127.0.0.1:{port}/status and /metrics", port=port)
+
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        daemon.stop()
+    finally:
+        server.shutdown()
+        daemon._save_state()
+        emit("Stopped")
@@ -0,0 +1,80 @@
+import json
+import threading
+from datetime import UTC, datetime
+from pathlib import Path
+
+from .feed import FeedEntry
+
+
+class DeadLetterWriter:
+    """Append-only JSONL record of job URLs that ran out of retries."""
+
+    def __init__(self, path: str | Path, mode: str = "w"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Kept open across writes; closed by close() / __exit__
+        self._file = open(self.path, mode, encoding="utf-8")  # noqa: SIM115
+        self._lock = threading.Lock()
+        self.count = 0
+        self.urls: set[str] = set()
+
+    def write(
+        self,
+        url: str,
+        source_site: str,
+        reason: str,
+        attempts: int,
+        feed_entry: FeedEntry | None = None,
+    ) -> None:
+        """Record a failed URL with the feed metadata a retry should reuse."""
+        record = {
+            "url": url,
+            "source_site": source_site,
+            "reason": reason,
+            "attempts": attempts,
+            "failed_at": datetime.now(UTC).isoformat(),
+        }
+        if feed_entry:
+            record["posted_at"] = feed_entry.posted_at
+            record["location"] = feed_entry.location
+        self.write_record(record)
+
+    def write_record(self, record: dict) -> None:
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self.count += 1
+            self.urls.add(record["url"])
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_dead_letters(path: str | Path) -> dict[str, dict[str, dict]]:
+    """Load failed job records by source site and URL, without duplicates."""
+    by_site: dict[str, dict[str, dict]] = {}
+    seen = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record["url"] in seen:
+                continue
+            seen.add(record["url"])
+            by_site.setdefault(record["source_site"], {})[record["url"]] = record
+    return by_site
+
+
+def stored_feed_entry(record: dict) -> FeedEntry | None:
+    """The feed metadata a dead-letter record was written with, if any."""
+    if record.get("posted_at") or record.get("location"):
+        return FeedEntry(record.get("posted_at"), record.get("location"))
+    return None
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import re
+import threading
+from urllib.parse import urlparse
+
+from .models import Job
+
+JOB_ID_PATTERN = re.compile(r"/JobDetail/(?:[^/?#]+/)?(\d+)(?:[/?#]|$)")
+
+
+def job_key(url: str) -> str | None:
+    """
+    Canonical key for a JobDetail URL: host plus the numeric job id.
+
+    Locale and portal paths are ignored, so
+    /es_ES/main/JobDetail/Analista/123 and /en_US/main/JobDetail/Analyst/123
+    on the same host map to the same key.
+    """
+    match = JOB_ID_PATTERN.search(url)
+    if not match:
+        return None
+    return f"{urlparse(url).netloc.lower()}:{match.group(1)}"
+
+
+def content_hash(job: Job) -> str:
+    """Hash of the parsed content, independent of the URL it came from."""
+    payload = json.dumps(
+        [job.title, job.description, job.location, job.metadata],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class JobDeduplicator:
+    """
+    Collapses duplicate postings across locales and portals.
+
+    Before fetching, each sitemap entry (a JobDetail URL plus its hreflang
+    alternates) is reduced to one URL, and entries whose canonical job key
+    was already seen in this run are dropped. After parsing, jobs whose
+    content hash was already written are caught as well.
+    """
+
+    def __init__(self):
+        self._keys: set[str] = set()
+        self._hashes: set[str] = set()
+        self._lock = threading.Lock()
+        self.skipped_urls = 0
+        self.skipped_content = 0
+
+    def filter_groups(self, groups: list[list[str]]) -> list[str]:
+        """Pick one URL per unseen job from groups of alternate URLs."""
+        urls = []
+        with self._lock:
+            for group in groups:
+                keys = {key for key in map(job_key, group) if key}
+                if keys & self._keys:
+                    self.skipped_urls += 1
+                    continue
+                self._keys.update(keys)
+                urls.append(group[0])
+        return urls
+
+    def is_duplicate(self, job: Job) -> bool:
+        """Record the job's content and report whether it was seen before."""
+        digest = content_hash(job)
+        with self._lock:
+            if digest in self._hashes:
+                self.skipped_content += 1
+                return True
+            self._hashes.add(digest)
+            return False
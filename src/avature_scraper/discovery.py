@@ -1,26 +1,153 @@
 import asyncio
+import json
 import re
-from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote_plus, urlparse
 
 import requests
-from bs4 import BeautifulSoup
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
+from .discovery_cache import DiscoveryCache
+from .http import create_session
+from .scraper import AvatureScraper
+from .sitemap_parser import SitemapParser
+
+VALIDATION_WORKERS = 8  # Domains validated concurrently
+SEARCH_SESSIONS = 3  # Isolated browser sessions running queries concurrently
+
+# Query variants; the last one finds portals hosted on custom domains
+SEARCH_QUERIES = [
+    "site:*.avature.net inurl:SearchJobs",
+    "site:*.avature.net inurl:JobDetail",
+    "site:*.avature.net inurl:en_US",
+    "site:*.avature.net inurl:es_ES",
+    '"avature" inurl:SearchJobs -site:avature.net',
+]
+
+RESULTS_SELECTOR = "a:has(h3)"
+CAPTCHA_SELECTOR = '#captcha-form, iframe[title="reCAPTCHA"]'
+RESULTS_TIMEOUT_MS = 10_000
+CAPTCHA_TIMEOUT_MS = 5_000  # After the automatic Tab + Space attempt
+MANUAL_CAPTCHA_TIMEOUT_MS = 60_000
+
+NEXT_PAGE_CODE = f"""async (page) => {{
+    const next = await page.$('#pnnext');
+    if (!next) {{
+        return false;
+    }}
+    await Promise.all([page.waitForNavigation(), next.click()]);
+    await page.waitForSelector(
+        {json.dumps(f"{RESULTS_SELECTOR}, {CAPTCHA_SELECTOR}")},
+        {{ timeout: {RESULTS_TIMEOUT_MS} }}
+    ).catch(() => null);
+    return true;
+}}"""
+
+# browser_run_code replies with a "### Result" section holding the returned
+# value, followed by sections that echo the code that was run
+RESULT_SECTION = re.compile(
+    r"^### Result\s*\n(.*?)(?=^### |\Z)", re.DOTALL | re.MULTILINE
+)
+
+
+def _returned_true(result) -> bool:
+    """Whether the code run by browser_run_code returned exactly true."""
+    text = "".join(getattr(item, "text", "") for item in result.content or ())
+    match = RESULT_SECTION.search(text)
+    if match:
+        value = match.group(1)
+    elif "###" not in text:
+        value = text  # Bare value, without sections
+    else:
+        return False
+    try:
+        return json.loads(value.strip()) is True
+    except ValueError:
+        return False
+
 
 class AvatureDiscovery:
-    def __init__(self):
+    def __init__(
+        self,
+        workers: int = VALIDATION_WORKERS,
+        count_jobs: bool = False,
+        cache: DiscoveryCache | None = None,
+        known_sites: list[str] = (),
+        queries: list[str] | None = None,
+        search_sessions: int = SEARCH_SESSIONS,
+    ):
         self.discovered_urls = set()
+        self.workers = workers
+        self.count_jobs = count_jobs
+        self.cache = cache
+        self.known_sites = {url.rstrip("/") for url in known_sites}
+        self.known_domains = {urlparse(url).netloc for url in known_sites}
+        self.queries = queries or SEARCH_QUERIES
+        self.search_sessions = search_sessions
 
     async def discover_sources(
         self, max_pages: int = 3, max_results: int = 50
     ) -> list[str]:
         """Discover Avature career sites using Google search via Playwright MCP."""
+        pending = []
+        for query in self.queries:
+            cached = self.cache.get_query(query, max_pages) if self.cache else None
+            if cached is None:
+                pending.append(query)
+            else:
+                self.discovered_urls.update(cached)
+
+        cached_count = len(self.queries) - len(pending)
+        if cached_count:
+            print(f"Using cached search results for {cached_count} query(s)")
+        if pending:
+            await self._search(pending, max_pages, max_results)
+        else:
+            print("All queries cached, skipping browser")
+
+        # Validate discovered URLs using HTTP requests (same as main scraper)
+        try:
+            validated = self._validate_urls()
+        finally:
+            if self.cache:
+                self.cache.save()
+
+        # Only report sources that are not in the sites file yet
+        return sorted(url for url in validated if url not in self.known_sites)
+
+    async def _search(self, queries: list[str], max_pages: int, max_results: int):
+        """Run queries concurrently, each browser session taking the next one."""
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        for query in queries:
+            queue.put_nowait(query)
+
+        sessions = max(1, min(self.search_sessions, len(queries)))
+        print(
+            f"Discovering Avature sources via Google search "
+            f"({len(queries)} queries, {sessions} browser sessions)..."
+        )
+        results = await asyncio.gather(
+            *(
+                self._search_worker(queue, max_pages, max_results)
+                for _ in range(sessions)
+            ),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"  ⚠ Browser session failed: {result}")
+
+    async def _search_worker(
+        self, queue: asyncio.Queue, max_pages: int, max_results: int
+    ) -> None:
+        """Drive one isolated Playwright MCP browser through queued queries."""
         server_params = StdioServerParameters(
             command="npx",
             args=[
                 "-y",
                 "@playwright/mcp@latest",
+                "--isolated",
             ],
             env=None,
         )
@@ -29,85 +156,47 @@ class AvatureDiscovery:
             async with ClientSession(read, write) as session:
                 await session.initialize()
 
-                print("Discovering Avature sources via Google search...")
-                await self._search_and_extract(session, max_pages, max_results)
+                while len(self.discovered_urls) < max_results:
+                    try:
+                        query = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+
+                    found = await self._search_and_extract(
+                        session, query, max_pages, max_results
+                    )
+                    # Empty results usually mean a CAPTCHA or error; retry next run
+                    if self.cache and found:
+                        self.cache.set_query(query, max_pages, found)
+                        self.cache.save()
 
                 # Close browser - we're done with Playwright
                 try:
                     await session.call_tool("browser_close", arguments={})
-                except:
+                except Exception:
                     pass
 
-        # Validate discovered URLs using HTTP requests (same as main scraper)
-        validated = self._validate_urls()
-
-        return sorted(validated)
-
     async def _search_and_extract(
-        self, session: ClientSession, max_pages: int, max_results: int
-    ) -> None:
-        """Perform Google search and extract Avature URLs."""
-        # Navigate to Google
+        self, session: ClientSession, query: str, max_pages: int, max_results: int
+    ) -> set[str]:
+        """Run one Google query page by page; return the Avature URLs it found."""
+        found: set[str] = set()
+
+        # Open the results page directly instead of typing into the search box
         await session.call_tool(
             "browser_navigate",
-            arguments={"url": "https://www.google.com"},
+            arguments={"url": f"https://www.google.com/search?q={quote_plus(query)}"},
+        )
+        await self._wait_for_selector(
+            session, f"{RESULTS_SELECTOR}, {CAPTCHA_SELECTOR}", RESULTS_TIMEOUT_MS
         )
-
-        # Wait for page to load
-        await asyncio.sleep(2)
-
-        # Check for CAPTCHA and handle it
-        await self._handle_captcha_if_present(session)
-
-        # Get snapshot to find search box ref
-        snapshot = await session.call_tool("browser_snapshot", arguments={})
-        snapshot_text = str(snapshot.content[0].text if snapshot.content else "")
-
-        # Find search textbox ref (combobox or textbox with "search" or "buscar")
-        search_ref = None
-        for line in snapshot_text.split("\n"):
-            line_lower = line.lower()
-            if ("combobox" in line_lower or "textbox" in line_lower) and (
-                "search" in line_lower or "buscar" in line_lower
-            ):
-                match = re.search(r"\[ref=(\w+)\]", line)
-                if match:
-                    search_ref = match.group(1)
-                    break
-
-        if not search_ref:
-            print("  Could not find search box, using keyboard fallback")
-            search_query = "site:*.avature.net inurl:SearchJobs"
-            for char in search_query:
-                await session.call_tool(
-                    "browser_press_key",
-                    arguments={"key": char},
-                )
-                await asyncio.sleep(0.03)
-            await session.call_tool(
-                "browser_press_key",
-                arguments={"key": "Enter"},
-            )
-        else:
-            # Type search query and submit
-            await session.call_tool(
-                "browser_type",
-                arguments={
-                    "ref": search_ref,
-                    "text": "site:*.avature.net inurl:SearchJobs",
-                    "submit": True,
-                },
-            )
-
-        # Wait for search results to load
-        await asyncio.sleep(3)
 
         # Check for CAPTCHA and handle it
         await self._handle_captcha_if_present(session)
 
         # Extract URLs from multiple pages
         for page_num in range(1, max_pages + 1):
-            print(f"  Scanning page {page_num}...")
+            print(f"  [{query}] Scanning page {page_num}...")
 
             # Extract URLs from search results using CSS selector
             result = await session.call_tool(
@@ -115,7 +204,9 @@ class AvatureDiscovery:
                 arguments={
                     "function": """() => {
                         const links = document.querySelectorAll('a:has(h3)');
-                        return Array.from(links).map(a => a.href).filter(url => url.includes('avature.net'));
+                        return Array.from(links).map(a => a.href).filter(
+                            url => url.includes('avature.net') || /\\/(SearchJobs|JobDetail)/i.test(url)
+                        );
                     }"""
                 },
             )
@@ -124,47 +215,56 @@ class AvatureDiscovery:
             if result.content:
                 content_str = str(result.content[0].text if result.content else "")
                 before_count = len(self.discovered_urls)
-                self._extract_avature_urls(content_str)
-                found = len(self.discovered_urls) - before_count
-                if found > 0:
-                    print(f"    Found {found} new URLs")
+                found |= self._extract_avature_urls(content_str)
+                new_count = len(self.discovered_urls) - before_count
+                if new_count > 0:
+                    print(f"    [{query}] Found {new_count} new URLs")
 
             # Stop if we have enough results
             if len(self.discovered_urls) >= max_results:
                 break
 
-            # Click next page link if not last
+            # Click next page link if not last; the code waits for the results
             if page_num < max_pages:
                 try:
                     result = await session.call_tool(
                         "browser_run_code",
-                        arguments={
-                            "code": """async (page) => {
-                                const next = await page.$('#pnnext');
-                                if (next) {
-                                    await next.click();
-                                    return true;
-                                }
-                                return false;
-                            }"""
-                        },
-                    )
-                    clicked = (
-                        "true" in str(result.content).lower()
-                        if result.content
-                        else False
+                        arguments={"code": NEXT_PAGE_CODE},
                     )
-                    if clicked:
-                        print(f"    Navigating to page {page_num + 1}...")
-                        await asyncio.sleep(3)
+                    if _returned_true(result):
+                        print(f"    [{query}] Navigated to page {page_num + 1}")
                         await self._handle_captcha_if_present(session)
                     else:
-                        print("    No more pages available")
+                        print(f"    [{query}] No more pages available")
                         break
                 except Exception as e:
-                    print(f"    Could not navigate to page {page_num + 1}: {e}")
+                    print(
+                        f"    [{query}] Could not navigate to page {page_num + 1}: {e}"
+                    )
                     break
 
+        return found
+
+    async def _wait_for_selector(
+        self, session: ClientSession, selector: str, timeout_ms: int
+    ) -> bool:
+        """Wait in the browser until the selector matches; False on timeout."""
+        code = f"""async (page) => {{
+            try {{
+                await page.waitForSelector({json.dumps(selector)}, {{ timeout: {timeout_ms} }});
+                return true;
+            }} catch (e) {{
+                return false;
+            }}
+        }}"""
+        try:
+            result = await session.call_tool(
+                "browser_run_code", arguments={"code": code}
+            )
+        except Exception:
+            return False
+        return _returned_true(result)
+
     async def _handle_captcha_if_present(self, session: ClientSession) -> None:
         """Detect CAPTCHA page and attempt to solve by pressing Tab + Space."""
         try:
@@ -178,20 +278,19 @@ class AvatureDiscovery:
                 "browser_press_key",
                 arguments={"key": "Tab"},
             )
-            await asyncio.sleep(0.5)
-
             await session.call_tool(
                 "browser_press_key",
                 arguments={"key": " "},
             )
 
-            # Wait for CAPTCHA to process
-            await asyncio.sleep(5)
-
-            # Check if CAPTCHA is still present
-            if await self._is_captcha_present(session):
+            # Wait for the results to show up instead of a fixed delay
+            if not await self._wait_for_selector(
+                session, RESULTS_SELECTOR, CAPTCHA_TIMEOUT_MS
+            ):
                 print("  ⚠ Auto-solve failed. Please solve the CAPTCHA manually...")
-                await asyncio.sleep(30)
+                await self._wait_for_selector(
+                    session, RESULTS_SELECTOR, MANUAL_CAPTCHA_TIMEOUT_MS
+                )
 
         except Exception as e:
             print(f"  ⚠ CAPTCHA check error: {e}")
@@ -216,15 +315,29 @@ class AvatureDiscovery:
         except Exception:
             return False
 
-    def _extract_avature_urls(self, content: str) -> None:
-        """Extract Avature career site URLs from page content."""
-        # Pattern to match full Avature URLs
-        pattern = r"https://([a-zA-Z0-9-]+)\.avature\.net(/[^\s\"'>\]]+)?"
+    def _extract_avature_urls(self, content: str) -> set[str]:
+        """
+        Extract Avature career site URLs from page content.
+
+        Adds them to discovered_urls and returns the portal URLs matched.
+        Hosts outside avature.net only count with a SearchJobs or JobDetail
+        path, which is how portals on custom domains are recognized.
+        """
+        # Pattern to match full URLs; non-Avature ones are filtered below
+        pattern = r"https://([a-zA-Z0-9.-]+)(/[^\s\"'>\]]+)?"
 
+        found = set()
         matches = re.findall(pattern, content)
-        for subdomain, path in matches:
+        for host, path in matches:
+            host = host.lower()
             path = path or ""
 
+            if not host.endswith(".avature.net") and (
+                "google." in host
+                or not re.search(r"/(searchjobs|jobdetail)", path.lower())
+            ):
+                continue
+
             # Skip static assets
             if any(x in path.lower() for x in [".js", ".css", ".png", ".jpg", ".gif"]):
                 continue
@@ -242,95 +355,150 @@ class AvatureDiscovery:
             elif "/jobdetail" in path_lower:
                 path = path[: path_lower.index("/jobdetail")]
 
-            url = (
-                f"https://{subdomain}.avature.net{path}"
-                if path
-                else f"https://{subdomain}.avature.net"
-            )
+            url = f"https://{host}{path}" if path else f"https://{host}"
             self.discovered_urls.add(url)
+            found.add(url)
+
+        return found
 
     def _validate_urls(self) -> list[str]:
-        """Validate URLs by following redirects and checking for sitemaps with JobDetail URLs."""
-        print(f"\nValidating {len(self.discovered_urls)} discovered URLs...")
-        validated = []
+        """
+        Validate URLs by following redirects and checking for sitemaps with JobDetail URLs.
 
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-        }
+        Domains are validated concurrently over one pooled session. Within a
+        domain, endpoints are tried one at a time and validation stops at the
+        first working one, so each host sees at most one request in flight.
+        """
+        print(f"\nValidating {len(self.discovered_urls)} discovered URLs...")
 
-        # Group URLs by domain
+        # Group URLs by domain, leaving out domains already in the sites file
         domains: dict[str, list[str]] = {}
         for url in self.discovered_urls:
             domain = urlparse(url).netloc
+            if domain in self.known_domains:
+                continue
             if domain not in domains:
                 domains[domain] = []
             domains[domain].append(url)
 
-        # Validate each domain's endpoints
-        for domain in sorted(domains.keys()):
-            endpoints = domains[domain]
-            print(f"\n  {domain}:")
-
-            for url in sorted(endpoints):
-                path = urlparse(url).path or "/"
-                try:
-                    # Follow redirects to get final URL
-                    response = requests.get(url, headers=headers, timeout=30)
-
-                    # Skip if not 200
-                    if response.status_code != 200:
-                        print(f"    ✗ {path} - HTTP {response.status_code}")
-                        continue
+        skipped = {urlparse(url).netloc for url in self.discovered_urls} - set(domains)
+        if skipped:
+            print(f"  Skipping {len(skipped)} domain(s) already in the sites file")
 
-                    final_url = response.url.rstrip("/")
+        session = self._create_session()
+        sitemap = SitemapParser(session)
+        validated = []
 
-                    # Check if sitemap contains JobDetail URLs
-                    job_count = self._check_sitemap_for_jobs(final_url, headers)
-                    if job_count > 0:
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = executor.map(
+                    lambda domain: self._validate_domain(
+                        sitemap, domain, sorted(domains[domain])
+                    ),
+                    sorted(domains.keys()),
+                )
+                # Each domain's report is printed as one block, in domain order
+                for final_url, report in results:
+                    print("\n".join(report))
+                    if final_url:
                         validated.append(final_url)
-                        print(f"    ✓ {path} → {final_url} ({job_count} jobs)")
-                        break  # Found working endpoint, move to next domain
-                    else:
-                        print(f"    ✗ {path} - No JobDetail URLs in sitemap")
-
-                except Exception as e:
-                    print(f"    ✗ {path} - {e}")
-                    continue
+        finally:
+            session.close()
 
         return validated
 
-    def _check_sitemap_for_jobs(self, base_url: str, headers: dict) -> int:
-        """Check if sitemap contains JobDetail URLs using the same parser as the scraper."""
-        sitemap_url = f"{base_url}/sitemap.xml"
-
-        try:
-            response = requests.get(sitemap_url, headers=headers, timeout=30)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.text, "lxml-xml")
+    def _create_session(self) -> requests.Session:
+        """Session whose connection pool is sized for the validation workers."""
+        return create_session(self.workers, AvatureScraper.DEFAULT_HEADERS)
+
+    def _validate_domain(
+        self, sitemap: SitemapParser, domain: str, endpoints: list[str]
+    ) -> tuple[str | None, list[str]]:
+        """Try a domain's endpoints in order; return the first working one."""
+        report = [f"\n  {domain}:"]
+
+        cached = self.cache.get_domain(domain) if self.cache else None
+        # A probe-only result can't answer a --count run
+        uncounted = cached and cached["url"] and cached["job_count"] is None
+        if cached and not (self.count_jobs and uncounted):
+            if cached["url"]:
+                jobs = f"{cached['job_count']} jobs, " if cached["job_count"] else ""
+                report.append(f"    ✓ {cached['url']} ({jobs}cached)")
+            else:
+                report.append("    ✗ no working endpoint (cached)")
+            return cached["url"], report
+
+        final_url, job_count, conclusive = self._find_endpoint(
+            sitemap, endpoints, report
+        )
+        # Network errors may be transient, so only definite answers are cached
+        if self.cache and conclusive:
+            self.cache.set_domain(domain, final_url, job_count)
+        return final_url, report
+
+    def _find_endpoint(
+        self, sitemap: SitemapParser, endpoints: list[str], report: list[str]
+    ) -> tuple[str | None, int | None, bool]:
+        """
+        Return the first endpoint whose sitemap lists jobs and its job count.
+
+        The flag is False if an endpoint failed with a network error or a
+        5xx response, i.e. a negative outcome may not hold on the next run.
+        """
+        conclusive = True
+        for url in endpoints:
+            path = urlparse(url).path or "/"
+            try:
+                # Follow redirects to get final URL
+                final_url = self._resolve(sitemap, url)
+
+                # Check if sitemap contains JobDetail URLs; without count_jobs
+                # the download stops at the first one
+                job_count = sitemap.probe(final_url, count=self.count_jobs)
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                report.append(f"    ✗ {path} - HTTP {status}")
+                # Server errors may be transient; only 4xx is a definite answer
+                if status is None or status >= 500:
+                    conclusive = False
+                continue
+            except (requests.RequestException, RuntimeError) as e:
+                report.append(f"    ✗ {path} - {e}")
+                conclusive = False
+                continue
 
-            job_urls = []
-            for link in soup.find_all("link", attrs={"hreflang": "x-default"}):
-                href = link.get("href")
-                if href and "/JobDetail/" in href:
-                    path_parts = href.split("/JobDetail/")
-                    if len(path_parts) > 1 and path_parts[1]:
-                        job_urls.append(href)
+            if job_count > 0:
+                jobs = f"{job_count} jobs" if self.count_jobs else "has jobs"
+                report.append(f"    ✓ {path} → {final_url} ({jobs})")
+                # Found working endpoint
+                return final_url, job_count if self.count_jobs else None, True
+            report.append(f"    ✗ {path} - No JobDetail URLs in sitemap")
 
-            return len(set(job_urls))
+        return None, None, conclusive
 
-        except Exception:
-            return 0
+    def _resolve(self, sitemap: SitemapParser, url: str) -> str:
+        """Follow redirects, reusing a cached final URL when there is one."""
+        final_url = self.cache.get_redirect(url) if self.cache else None
+        if final_url is None:
+            final_url = sitemap.resolve(url)
+            if self.cache:
+                self.cache.set_redirect(url, final_url)
+        return final_url
 
 
 async def discover_avature_sources(
-    max_pages: int = 3, max_results: int = 50
+    max_pages: int = 3, max_results: int = 50, **options
 ) -> list[str]:
-    """Main entry point for discovering Avature sources."""
-    discovery = AvatureDiscovery()
+    """
+    Main entry point for discovering Avature sources.
+
+    Keyword options (workers, count_jobs, cache, known_sites) are passed on
+    to AvatureDiscovery.
+    """
+    discovery = AvatureDiscovery(**options)
     return await discovery.discover_sources(max_pages, max_results)
 
 
-def run_discovery(max_pages: int = 3, max_results: int = 50) -> list[str]:
+def run_discovery(max_pages: int = 3, max_results: int = 50, **options) -> list[str]:
     """Synchronous wrapper for discovery."""
-    return asyncio.run(discover_avature_sources(max_pages, max_results))
+    return asyncio.run(discover_avature_sources(max_pages, max_results, **options))
@@ -0,0 +1,72 @@
+import json
+import threading
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+DEFAULT_TTL_HOURS = 24 * 7
+
+
+class DiscoveryCache:
+    """
+    JSON cache of discovery work, with entries expiring after a TTL.
+
+    Holds the URLs found per search query, the validation outcome per domain
+    (final URL or None, plus the job count if counted) and resolved redirects,
+    so re-runs only drive the browser and the network for what is new.
+    """
+
+    def __init__(self, path: str | Path, ttl_hours: float = DEFAULT_TTL_HOURS):
+        self.path = Path(path)
+        self.ttl = timedelta(hours=ttl_hours)
+        self.data: dict[str, dict] = {"queries": {}, "domains": {}, "redirects": {}}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.data.update(json.load(f))
+
+    def get_query(self, query: str, max_pages: int) -> list[str] | None:
+        """URLs cached for a search that scanned at least max_pages pages."""
+        entry = self._get("queries", query)
+        if entry and entry["max_pages"] >= max_pages:
+            return entry["urls"]
+        return None
+
+    def set_query(self, query: str, max_pages: int, urls) -> None:
+        self._set("queries", query, {"max_pages": max_pages, "urls": sorted(urls)})
+
+    def get_domain(self, domain: str) -> dict | None:
+        """Validation outcome: {"url": final URL or None, "job_count": ...}."""
+        return self._get("domains", domain)
+
+    def set_domain(self, domain: str, url: str | None, job_count: int | None):
+        self._set("domains", domain, {"url": url, "job_count": job_count})
+
+    def get_redirect(self, url: str) -> str | None:
+        entry = self._get("redirects", url)
+        return entry["final_url"] if entry else None
+
+    def set_redirect(self, url: str, final_url: str) -> None:
+        self._set("redirects", url, {"final_url": final_url})
+
+    def save(self) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=2, sort_keys=True)
+            tmp.replace(self.path)
+
+    def _get(self, section: str, key: str) -> dict | None:
+        with self._lock:
+            entry = self.data[section].get(key)
+        if not entry:
+            return None
+        cached_at = datetime.fromisoformat(entry["cached_at"])
+        if datetime.now(UTC) - cached_at > self.ttl:
+            return None
+        return entry
+
+    def _set(self, section: str, key: str, entry: dict) -> None:
+        entry["cached_at"] = datetime.now(UTC).isoformat()
+        with self._lock:
+            self.data[section][key] = entry
@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+
+import requests
+from lxml import etree
+
+from .dedup import job_key
+from .http import fetch, transfer_stats
+
+FEED_RECORDS = 10000  # jobRecordsPerPage; the whole feed in one request
+FEED_CHUNK_SIZE = 16 * 1024
+LOCATION_TAGS = ("location", "joblocation", "city")
+
+
+@dataclass
+class FeedEntry:
+    posted_at: str | None = None
+    location: str | None = None
+
+
+def feed_url(base_url: str, records: int = FEED_RECORDS) -> str:
+    return f"{base_url}/SearchJobs/feed/?jobRecordsPerPage={records}"
+
+
+class FeedReader:
+    """
+    Reads a portal's RSS job feed into a job key -> FeedEntry map.
+
+    The feed is streamed and each <item> is dropped once read, so large
+    feeds are never held as a tree. pubDate is kept in its RFC 822 form.
+    Keys come from dedup.job_key, so feed links match sitemap URLs across
+    locales and slugs.
+    """
+
+    def __init__(self, session: requests.Session):
+        self.session = session
+
+    def read(self, base_url: str) -> dict[str, FeedEntry]:
+        response = fetch(self.session, feed_url(base_url), stream=True)
+        parser = etree.XMLPullParser(events=("end",), recover=True, huge_tree=True)
+        entries: dict[str, FeedEntry] = {}
+        received = 0
+
+        try:
+            for chunk in response.iter_content(FEED_CHUNK_SIZE):
+                received += len(chunk)
+                parser.feed(chunk)
+                for _, element in parser.read_events():
+                    if _local_name(element.tag) != "item":
+                        continue
+                    key, entry = _parse_item(element)
+                    if key and (entry.posted_at or entry.location):
+                        entries[key] = entry
+                    element.clear()
+                    while element.getprevious() is not None:
+                        del element.getparent()[0]
+        finally:
+            transfer_stats.record(response, received)
+            response.close()
+
+        return entries
+
+
+def _parse_item(item) -> tuple[str | None, FeedEntry]:
+    link = posted_at = location = None
+    for child in item:
+        name = _local_name(child.tag)
+        text = (child.text or "").strip() or None
+        if name == "link":
+            link = text
+        elif name == "pubdate":
+            posted_at = text
+        elif name in LOCATION_TAGS and not location:
+            location = text
+    return job_key(link) if link else None, FeedEntry(posted_at, location)
+
+
+def _local_name(tag) -> str | None:
+    if not isinstance(tag, str):
+        return None
+    return tag.rsplit("}", 1)[-1].lower()
@@ -1,86 +1,400 @@
 import threading
 import time
+from urllib.parse import urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 
-RATE_LIMIT_COOLDOWN = 180  # 3 minutes based on empirical testing
+from .memory import format_bytes
+from .progress import emit
+
+CANARY_INITIAL_BACKOFF = 15  # Seconds before the first canary after a 406
+CANARY_MAX_BACKOFF = 240  # Cap; full recovery measured at ~180s
+RAMP_STEP_SUCCESSES = 5  # Successes before the ramp doubles concurrency
+RAMP_FULL_CONCURRENCY = 32  # Ramp limit at which traffic is unrestricted
+RAMP_POLL_INTERVAL = 0.5  # Re-check delay while a canary or ramp slot is busy
 MAX_RATE_LIMIT_RETRIES = 3
+POOL_HOSTS = 32  # Per-host connection pools kept alive, across sites
 
-_rate_limit_lock = threading.Lock()
-_rate_limit_until = 0.0
+NORMAL = "normal"
+COOLING = "cooling"
+PROBING = "probing"
+RAMPING = "ramping"
 
 
-def fetch(
-    session: requests.Session,
-    url: str,
-    follow_redirects: bool = True,
-    timeout: int = 30,
-) -> requests.Response:
+class RateLimitError(RuntimeError):
     """
-    Make HTTP request with rate limit handling.
+    Raised instead of sleeping when a non-blocking fetch hits a cooldown.
+
+    `rejected` is True when the server answered 406/429 to this request and
+    False when the request was never sent because the host is recovering.
+    """
+
+    def __init__(self, message: str, retry_in: float, rejected: bool = False):
+        super().__init__(message)
+        self.retry_in = retry_in
+        self.rejected = rejected
+
+
+class HostRecovery:
+    """
+    Rate-limit recovery state machine for one host.
+
+    normal -> cooling on a 406/429. Once the backoff has passed, a single
+    canary request is let through (probing) while everything else stays
+    parked. A rejected canary doubles the backoff and cools again; a
+    successful one starts ramping, where concurrency starts at 1 and doubles
+    every RAMP_STEP_SUCCESSES successes until traffic is back to normal.
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        self.state = NORMAL
+        self.backoff = CANARY_INITIAL_BACKOFF
+        self.next_probe_at = 0.0
+        self.allowed = RAMP_FULL_CONCURRENCY
+        self.active = 0
+        self.probes = 0
+        self._ramp_successes = 0
+        self._cond = threading.Condition()
+
+    def wait_time(self) -> float:
+        """Seconds until this host accepts another request (0 if now)."""
+        with self._cond:
+            return self._wait_time(time.monotonic())
+
+    def acquire(self, block: bool = True) -> bool:
+        """
+        Take a request slot, parking until one is available.
+
+        Returns True if the caller is the canary. With block=False a
+        RateLimitError carrying the expected wait is raised instead.
+        """
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self.state == COOLING and now >= self.next_probe_at:
+                    self.state = PROBING
+                    self.probes += 1
+                    self.active += 1
+                    return True
+
+                wait_time = self._wait_time(now)
+                if wait_time <= 0:
+                    self.active += 1
+                    return False
+
+                if not block:
+                    raise RateLimitError(
+                        f"Rate limit recovery on {self.host} ({self.state})",
+                        wait_time,
+                    )
+                self._cond.wait(wait_time)
+
+    def release(self, canary: bool, rate_limited: bool, status: int = 406) -> None:
+        """Return a slot and advance the state machine with its outcome."""
+        with self._cond:
+            self.active -= 1
+            if rate_limited:
+                self._on_rate_limited(canary, status)
+            elif canary and not status:
+                # Canary failed without an answer; probe again after the same backoff
+                self.state = COOLING
+                self.next_probe_at = time.monotonic() + self.backoff
+            elif canary:
+                emit(
+                    f"  Rate limit on {self.host} recovered after {self.probes} "
+                    "probe(s), ramping up",
+                    level="warning",
+                    host=self.host,
+                    probes=self.probes,
+                )
+                self.state = RAMPING
+                self.allowed = 1
+                self.backoff = CANARY_INITIAL_BACKOFF
+                self.probes = 0
+                self._ramp_successes = 0
+            elif self.state == RAMPING:
+                self._ramp_successes += 1
+                if self._ramp_successes >= RAMP_STEP_SUCCESSES:
+                    self._ramp_successes = 0
+                    self.allowed *= 2
+                    if self.allowed >= RAMP_FULL_CONCURRENCY:
+                        self.state = NORMAL
+            self._cond.notify_all()
+
+    def _wait_time(self, now: float) -> float:
+        if self.state == COOLING:
+            return max(0.0, self.next_probe_at - now)
+        if self.state == PROBING:
+            return RAMP_POLL_INTERVAL
+        if self.state == RAMPING and self.active >= self.allowed:
+            return RAMP_POLL_INTERVAL
+        return 0.0
+
+    def _on_rate_limited(self, canary: bool, status: int) -> None:
+        if canary:
+            self.backoff = min(self.backoff * 2, CANARY_MAX_BACKOFF)
+        elif self.state in (COOLING, PROBING):
+            return  # Sent before the cooldown started; already handled
+
+        if self.state == NORMAL:
+            self.backoff = CANARY_INITIAL_BACKOFF
+        self.state = COOLING
+        self.next_probe_at = time.monotonic() + self.backoff
+        emit(
+            f"  Rate limited ({status}) on {self.host}, parking requests; "
+            f"canary in {self.backoff:.0f}s",
+            level="warning",
+            host=self.host,
+            status=status,
+            backoff_s=self.backoff,
+        )
+
+
+_recovery_lock = threading.Lock()
+_recoveries: dict[str, HostRecovery] = {}
+
+
+def get_recovery(host: str) -> HostRecovery:
+    """Get the shared recovery state for a host."""
+    with _recovery_lock:
+        if host not in _recoveries:
+            _recoveries[host] = HostRecovery(host)
+        return _recoveries[host]
+
+
+class ConnectionStats:
+    """Requests sent, connections opened and time spent opening them (TCP+TLS)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections: dict[str, int] = {}
+        self.connect_seconds: dict[str, float] = {}
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_connect(self, host: str, seconds: float) -> None:
+        with self._lock:
+            self.connections[host] = self.connections.get(host, 0) + 1
+            self.connect_seconds[host] = self.connect_seconds.get(host, 0.0) + seconds
+
+    def per_host(self) -> dict[str, tuple[int, float]]:
+        """Connections opened and seconds spent opening them, by host."""
+        with self._lock:
+            return {
+                host: (count, self.connect_seconds[host])
+                for host, count in self.connections.items()
+            }
+
+    def summary(self) -> str:
+        with self._lock:
+            opened = sum(self.connections.values())
+            seconds = sum(self.connect_seconds.values())
+            requests_sent = self.requests
+        if not opened:
+            return f"Connections: none opened for {requests_sent} request(s)"
+        return (
+            f"Connections: {opened} opened to {len(self.connections)} host(s) for "
+            f"{requests_sent} request(s), {seconds / opened * 1000:.0f} ms "
+            f"average connect+handshake, {seconds:.1f}s total"
+        )
+
 
-    Handles 406/429 with 180s cooldown (based on empirical testing).
-    All workers pause when any worker hits rate limit.
-    Raises RuntimeError if rate limit persists after retries.
+def url_kind(url: str) -> str:
+    """Classify an Avature URL for transfer accounting."""
+    path = urlparse(url).path
+    if "/JobDetail/" in path:
+        return "job"
+    if path.endswith("sitemap.xml"):
+        return "sitemap"
+    if path.rstrip("/").endswith("/SearchJobs/feed"):
+        return "feed"
+    if "/SearchJobs" in path:
+        return "listing"
+    return "landing"
+
+
+class TransferStats:
     """
-    global _rate_limit_until
+    Response body bytes on the wire and after decompression.
+
+    Totals are kept per (host, url_kind). Wire bytes come from
+    urllib3's raw.tell(), so they are the compressed size when the
+    server honoured Accept-Encoding.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (host, kind) -> [responses, wire bytes, decoded bytes]
+        self._totals: dict[tuple[str, str], list[int]] = {}
+
+    def record(self, response: requests.Response, decoded: int) -> None:
+        """Record a response whose body has been read (decoded bytes given)."""
+        wire = response.raw.tell() if response.raw is not None else decoded
+        key = (urlparse(response.url).netloc, url_kind(response.url))
+        with self._lock:
+            totals = self._totals.setdefault(key, [0, 0, 0])
+            totals[0] += 1
+            totals[1] += wire
+            totals[2] += decoded
+
+    def by(self, field: str) -> dict[str, tuple[int, int, int]]:
+        """(responses, wire, decoded) grouped by "host" or "kind"."""
+        position = 0 if field == "host" else 1
+        grouped: dict[str, list[int]] = {}
+        with self._lock:
+            for key, totals in self._totals.items():
+                group = grouped.setdefault(key[position], [0, 0, 0])
+                for i, value in enumerate(totals):
+                    group[i] += value
+        return {name: tuple(values) for name, values in grouped.items()}
+
+    def summary(self, jobs: int) -> str:
+        kinds = self.by("kind")
+        wire = sum(totals[1] for totals in kinds.values())
+        decoded = sum(totals[2] for totals in kinds.values())
+        lines = [
+            f"Transfer: {format_bytes(wire)} received, "
+            f"{format_bytes(decoded)} decompressed"
+            + (f", {format_bytes(wire / jobs)} per job" if jobs else "")
+        ]
+        for kind, (responses, kind_wire, kind_decoded) in sorted(kinds.items()):
+            lines.append(
+                f"  {kind}: {responses} response(s), {format_bytes(kind_wire)} "
+                f"({format_bytes(kind_decoded)} decompressed)"
+            )
+        hosts = self.by("host")
+        if len(hosts) > 1:
+            for host, (responses, host_wire, _) in sorted(hosts.items()):
+                lines.append(f"  {host}: {format_bytes(host_wire)}")
+        return "\n".join(lines)
+
+
+connection_stats = ConnectionStats()
+transfer_stats = TransferStats()
+
+
+class _TimedConnect:
+    """Records each new connection and its TCP/TLS setup time."""
+
+    def connect(self) -> None:
+        start = time.monotonic()
+        super().connect()
+        connection_stats.record_connect(self.host, time.monotonic() - start)
+
+
+class _TimedHTTPConnection(_TimedConnect, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnect, HTTPSConnection):
+    pass
+
 
-    _wait_for_rate_limit()
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
 
-    try:
-        response = session.get(url, timeout=timeout, allow_redirects=follow_redirects)
-        response.raise_for_status()
-        return response
-    except requests.exceptions.HTTPError as e:
-        status = e.response.status_code
-        if status in (406, 429):
-            return _handle_rate_limit(session, url, status, follow_redirects, timeout)
-        raise
 
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
 
-def _wait_for_rate_limit():
-    """Wait if a global rate limit cooldown is active."""
-    global _rate_limit_until
 
-    with _rate_limit_lock:
-        wait_time = _rate_limit_until - time.time()
-        if wait_time > 0:
-            print(f"  Waiting {wait_time:.0f}s for global rate limit cooldown...")
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools count requests and time new connections."""
 
-    if wait_time > 0:
-        time.sleep(wait_time)
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
 
+    def send(self, request, *args, **kwargs):
+        connection_stats.record_request()
+        return super().send(request, *args, **kwargs)
 
-def _handle_rate_limit(
+
+def create_session(pool_size: int, headers: dict | None = None) -> requests.Session:
+    """
+    Session meant to be shared by all workers of a run.
+
+    Each host gets one pool of up to pool_size keep-alive connections (size
+    it to the number of concurrent workers), so connections are reused by
+    every worker and by later sites on the same host instead of being
+    opened per thread.
+    """
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+    adapter = PooledAdapter(pool_connections=POOL_HOSTS, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def fetch(
     session: requests.Session,
     url: str,
-    status: int,
-    follow_redirects: bool,
-    timeout: int,
+    follow_redirects: bool = True,
+    timeout: int = 30,
+    wait_on_rate_limit: bool = True,
+    stream: bool = False,
 ) -> requests.Response:
-    """Handle rate limiting with cooldown period. All workers pause."""
-    global _rate_limit_until
-
-    for attempt in range(1, MAX_RATE_LIMIT_RETRIES + 1):
-        with _rate_limit_lock:
-            _rate_limit_until = time.time() + RATE_LIMIT_COOLDOWN
-            print(
-                f"  Rate limited ({status}), ALL workers cooling down {RATE_LIMIT_COOLDOWN}s... (attempt {attempt}/{MAX_RATE_LIMIT_RETRIES})"
-            )
+    """
+    Make HTTP request with rate limit handling.
+
+    A 406/429 parks all requests to that host until a canary request gets
+    through (see HostRecovery), then traffic ramps back up.
+    Raises RuntimeError if this request is still rejected after
+    MAX_RATE_LIMIT_RETRIES probes.
 
-        time.sleep(RATE_LIMIT_COOLDOWN)
+    With wait_on_rate_limit=False the caller is never put to sleep: a parked
+    host or a rejected request raises RateLimitError with the expected wait,
+    so the caller can reschedule the URL and keep serving other work.
+
+    With stream=True the body of a successful response is not downloaded up
+    front; the caller reads it with iter_content, records it in
+    transfer_stats and must close the response.
+    """
+    recovery = get_recovery(urlparse(url).netloc)
+    rejections = 0
 
+    while True:
+        canary = recovery.acquire(block=wait_on_rate_limit)
+        status = None
         try:
             response = session.get(
-                url, timeout=timeout, allow_redirects=follow_redirects
+                url, timeout=timeout, allow_redirects=follow_redirects, stream=stream
             )
+            status = response.status_code
+            if not stream or status >= 400:
+                # Error responses are never handed to the caller: read their
+                # (small) body and close them, so a streamed one returns its
+                # connection to the pool instead of holding it until GC
+                try:
+                    transfer_stats.record(response, len(response.content))
+                finally:
+                    response.close()
+        finally:
+            recovery.release(canary, status in (406, 429), status or 0)
+
+        if status not in (406, 429):
             response.raise_for_status()
-            print(f"  Rate limit recovered after {attempt} cooldown(s)")
             return response
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code not in (406, 429):
-                raise
 
-    raise RuntimeError(
-        f"Rate limit not recovered after {MAX_RATE_LIMIT_RETRIES} cooldowns. Aborting."
-    )
+        if not wait_on_rate_limit:
+            raise RateLimitError(
+                f"Rate limited ({status})", recovery.wait_time(), rejected=True
+            )
+
+        rejections += 1
+        if rejections > MAX_RATE_LIMIT_RETRIES:
+            raise RuntimeError(
+                f"Rate limit not recovered after {MAX_RATE_LIMIT_RETRIES} probes. Aborting."
+            )
@@ -0,0 +1,176 @@
+import json
+import re
+import sqlite3
+from datetime import UTC, datetime
+from pathlib import Path
+
+from .models import Job
+
+COMMIT_EVERY = 100  # Upserts per transaction while scraping
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    apply_url TEXT NOT NULL UNIQUE,
+    source_site TEXT NOT NULL,
+    title TEXT NOT NULL,
+    location TEXT,
+    posted_at TEXT,
+    body TEXT NOT NULL,
+    data TEXT NOT NULL,
+    indexed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_source_site ON jobs(source_site);
+CREATE INDEX IF NOT EXISTS jobs_location ON jobs(location);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    title, body, location, content='jobs', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS jobs_ai AFTER INSERT ON jobs BEGIN
+    INSERT INTO jobs_fts(rowid, title, body, location)
+    VALUES (new.id, new.title, new.body, new.location);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_ad AFTER DELETE ON jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, body, location)
+    VALUES ('delete', old.id, old.title, old.body, old.location);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_au AFTER UPDATE ON jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, body, location)
+    VALUES ('delete', old.id, old.title, old.body, old.location);
+    INSERT INTO jobs_fts(rowid, title, body, location)
+    VALUES (new.id, new.title, new.body, new.location);
+END;
+"""
+
+UPSERT = """
+INSERT INTO jobs (
+    apply_url, source_site, title, location, posted_at, body, data, indexed_at
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(apply_url) DO UPDATE SET
+    source_site = excluded.source_site,
+    title = excluded.title,
+    location = excluded.location,
+    posted_at = excluded.posted_at,
+    body = excluded.body,
+    data = excluded.data,
+    indexed_at = excluded.indexed_at
+"""
+
+TAG = re.compile(r"<[^>]+>")
+WHITESPACE = re.compile(r"\s+")
+
+
+class JobIndex:
+    """
+    SQLite FTS5 index of scraped jobs, keyed by apply_url.
+
+    Jobs are upserted as they are scraped, so re-runs update rows in place.
+    The database runs in WAL mode, so queries can read it during a scrape.
+    Title, plain-text description and location are full-text searchable;
+    source_site and location also have regular indexes for filtering.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._pending = 0
+
+    def upsert(self, job: Job) -> None:
+        self.conn.execute(
+            UPSERT,
+            (
+                job.apply_url,
+                job.source_site,
+                job.title,
+                job.location,
+                job.posted_at,
+                job.description_text or _plain_text(job.description),
+                json.dumps(job.to_dict(), ensure_ascii=False),
+                datetime.now(UTC).isoformat(),
+            ),
+        )
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self.commit()
+
+    def commit(self) -> None:
+        self.conn.commit()
+        self._pending = 0
+
+    def search(
+        self,
+        text: str | None = None,
+        site: str | None = None,
+        location: str | None = None,
+        limit: int = 20,
+    ) -> list[dict]:
+        """
+        Find jobs matching all given filters, best text matches first.
+
+        Words in `text` must all appear in the title, description or
+        location; a trailing * matches a prefix (e.g. engin*).
+        """
+        sql = "SELECT jobs.data FROM jobs"
+        clauses, params = [], []
+        if text:
+            sql += " JOIN jobs_fts ON jobs_fts.rowid = jobs.id"
+            clauses.append("jobs_fts MATCH ?")
+            params.append(_fts_query(text))
+        if site:
+            clauses.append("jobs.source_site = ?")
+            params.append(site)
+        if location:
+            clauses.append("jobs.location LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(location)}%")
+
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY " + ("jobs_fts.rank" if text else "jobs.id DESC")
+        sql += " LIMIT ?"
+        params.append(limit)
+
+        return [json.loads(row["data"]) for row in self.conn.execute(sql, params)]
+
+    def remove(self, apply_urls: list[str]) -> None:
+        self.conn.executemany(
+            "DELETE FROM jobs WHERE apply_url = ?", [(url,) for url in apply_urls]
+        )
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def close(self) -> None:
+        self.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _escape_like(value: str) -> str:
+    """Match % and _ literally in a LIKE pattern (with ESCAPE '\\')."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _plain_text(html: str) -> str:
+    return WHITESPACE.sub(" ", TAG.sub(" ", html)).strip()
+
+
+def _fts_query(text: str) -> str:
+    """Quote each word so punctuation (C++, full-time) isn't FTS5 syntax."""
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
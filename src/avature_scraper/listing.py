@@ -0,0 +1,136 @@
+import re
+import time
+from collections.abc import Iterator
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+
+from .http import fetch
+from .models import Job
+
+LISTING_PAGE_SIZE = 100  # Requested jobRecordsPerPage; portals may cap it lower
+MAX_LISTING_PAGES = 500
+
+# Suffixes of the `list-item-*` classes on result fields
+LISTING_FIELDS = {
+    "location": "location",
+    "joblocation": "location",
+    "jobcreationdate": "posted_at",
+    "postingdate": "posted_at",
+    "posteddate": "posted_at",
+    "date": "posted_at",
+    "jobid": "ref_id",
+    "ref": "ref_id",
+    "requisitionid": "ref_id",
+    "businessarea": "business_area",
+    "department": "department",
+}
+
+JOB_DETAIL_LINK = re.compile(r"/JobDetail/[^/?#]")
+
+
+def listing_url(base_url: str, offset: int, page_size: int) -> str:
+    return f"{base_url}/SearchJobs/?jobOffset={offset}&jobRecordsPerPage={page_size}"
+
+
+def parse_listing(html: str, page_url: str, source_site: str) -> list[Job]:
+    """
+    Extract partial jobs from a SearchJobs result page.
+
+    Each result's JobDetail link gives the title and apply URL; the
+    `list-item-*` fields next to it give location, posting date and other
+    metadata. Descriptions are left empty.
+    """
+    soup = BeautifulSoup(html, "lxml")
+    jobs = []
+    seen = set()
+
+    for link in soup.find_all("a", href=JOB_DETAIL_LINK):
+        url = urljoin(page_url, link["href"])
+        title = link.get_text(" ", strip=True)
+        if not title or url in seen:
+            continue
+        seen.add(url)
+
+        metadata = _extract_fields(_result_container(link))
+        location = metadata.pop("location", None)
+        posted_at = metadata.pop("posted_at", None)
+        jobs.append(
+            Job(
+                title=title,
+                description="",
+                apply_url=url,
+                location=location,
+                posted_at=posted_at,
+                metadata=metadata,
+                source_site=source_site,
+            )
+        )
+
+    return jobs
+
+
+def _result_container(link):
+    """The element holding one search result."""
+    for parent in link.parents:
+        if parent.name in ("article", "li", "tr"):
+            return parent
+    return link.parent
+
+
+def _extract_fields(container) -> dict[str, str]:
+    fields = {}
+    for element in container.find_all(class_=re.compile(r"^list-item-")):
+        value = element.get_text(" ", strip=True)
+        if not value:
+            continue
+        for cls in element.get("class", []):
+            if cls.startswith("list-item-"):
+                name = cls[len("list-item-") :].lower()
+                key = LISTING_FIELDS.get(name.replace("-", "").replace("_", ""))
+                fields.setdefault(key or name.replace("-", "_"), value)
+    return fields
+
+
+class ListingHarvester:
+    """
+    Bulk job metadata from a portal's SearchJobs pages.
+
+    Pages through results with jobOffset/jobRecordsPerPage, advancing by the
+    number of jobs actually returned (portals may cap the page size), until
+    a page brings no new jobs. One request yields up to a page of jobs,
+    against one request per job for detail pages.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        page_size: int = LISTING_PAGE_SIZE,
+        delay: float = 0.0,
+    ):
+        self.session = session
+        self.page_size = page_size
+        self.delay = delay
+        self.pages = 0
+
+    def harvest(self, base_url: str, source_site: str) -> Iterator[Job]:
+        seen: set[str] = set()
+        offset = 0
+
+        for page in range(MAX_LISTING_PAGES):
+            if page and self.delay:
+                time.sleep(self.delay)
+
+            page_url = listing_url(base_url, offset, self.page_size)
+            response = fetch(self.session, page_url)
+            self.pages += 1
+
+            jobs = parse_listing(response.text, page_url, source_site)
+            new_jobs = [job for job in jobs if job.apply_url not in seen]
+            if not new_jobs:
+                return
+
+            seen.update(job.apply_url for job in new_jobs)
+            yield from new_jobs
+            offset += len(jobs)
@@ -1,7 +1,16 @@
 import argparse
+import json
+import sys
 from pathlib import Path
 
-from .scraper import AvatureScraper
+from .breaker import BREAKER_ERROR_RATE, BREAKER_STREAK
+from .discovery_cache import DEFAULT_TTL_HOURS, DiscoveryCache
+from .index import JobIndex
+from .parsers import ParserRegistry
+from .profiler import StageProfiler
+from .progress import LOG_FORMATS, ProgressReporter, emit, set_reporter
+from .scraper import AvatureScraper, default_dead_letter_path
+from .transform import DESCRIPTION_FORMATS, DescriptionTransformer
 
 
 def load_urls(input_path: Path) -> list[str]:
@@ -15,9 +24,191 @@ def load_urls(input_path: Path) -> list[str]:
     return urls
 
 
-def main():
+DEFAULT_INDEX = Path("output/jobs.db")
+
+
+def query(argv: list[str]) -> int:
+    """`avature-scraper query`: search the job index built with --index."""
     parser = argparse.ArgumentParser(
-        description="Scrape job postings from Avature-hosted career sites"
+        prog="avature-scraper query",
+        description="Search jobs in the full-text index",
+    )
+    parser.add_argument(
+        "text",
+        nargs="*",
+        help="Words to match in title, description or location (engin* for prefixes)",
+    )
+    parser.add_argument("--site", help="Only jobs from this source site (domain)")
+    parser.add_argument("--location", help="Only jobs whose location contains this")
+    parser.add_argument(
+        "--limit", type=int, default=20, help="Maximum results (default: 20)"
+    )
+    parser.add_argument(
+        "--index",
+        type=Path,
+        default=DEFAULT_INDEX,
+        help=f"Index database (default: {DEFAULT_INDEX})",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print matching jobs as JSON lines"
+    )
+    args = parser.parse_args(argv)
+
+    if not args.index.exists():
+        print(f"Error: Index not found: {args.index} (scrape with --index first)")
+        return 1
+
+    with JobIndex(args.index) as index:
+        jobs = index.search(
+            " ".join(args.text) or None, args.site, args.location, args.limit
+        )
+
+    for job in jobs:
+        if args.json:
+            print(json.dumps(job, ensure_ascii=False))
+            continue
+        details = " | ".join(
+            value for value in (job["location"], job["posted_at"]) if value
+        )
+        print(f"{job['title']} ({job['source_site']})")
+        if details:
+            print(f"  {details}")
+        print(f"  {job['apply_url']}")
+
+    if not args.json:
+        print(f"\n{len(jobs)} job(s)")
+    return 0
+
+
+def add_scraper_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options shared by the one-shot scraper and `serve`."""
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=1.5,
+        help="Delay between requests in seconds (default: 1.5)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of parallel workers for fetching jobs (default: 1)",
+    )
+    parser.add_argument(
+        "--breaker-error-rate",
+        type=float,
+        default=BREAKER_ERROR_RATE,
+        help="Share of a host's recent requests failing (timeouts, 5xx, "
+        "unparseable pages) that pauses it, 0 to disable "
+        f"(default: {BREAKER_ERROR_RATE})",
+    )
+    parser.add_argument(
+        "--breaker-streak",
+        type=int,
+        default=BREAKER_STREAK,
+        help="Consecutive failures on a host that pause it, 0 to disable "
+        f"(default: {BREAKER_STREAK})",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        metavar="MB",
+        help="Cap response bytes held by workers at once; workers wait for "
+        "room before reading another page",
+    )
+    parser.add_argument(
+        "--stream-parse",
+        action="store_true",
+        help="Stop downloading each job page once the parts the parser reads "
+        "are complete (after a domain's template has been detected)",
+    )
+    parser.add_argument(
+        "--no-feed",
+        action="store_true",
+        help="Don't read each site's job feed for posting dates and locations",
+    )
+    parser.add_argument(
+        "--clean-descriptions",
+        action="store_true",
+        help="Strip attributes and empty nodes from description HTML and "
+        "collapse whitespace",
+    )
+    parser.add_argument(
+        "--description-format",
+        choices=DESCRIPTION_FORMATS,
+        action="append",
+        default=[],
+        help="Also emit the description as plain text or Markdown "
+        "(description_text / description_markdown); repeatable",
+    )
+    parser.add_argument(
+        "--parser-cache",
+        type=Path,
+        default=Path("output/parser_selection.json"),
+        help="JSON file remembering the template detected for each domain "
+        "(default: output/parser_selection.json)",
+    )
+    parser.add_argument(
+        "--parser-rules",
+        type=Path,
+        help="JSON file of extraction rules for more templates and domains "
+        "(see README: Adding New Domain Parsers)",
+    )
+    parser.add_argument(
+        "--no-parser-cache",
+        action="store_true",
+        help="Re-detect templates on every run instead of using the cache",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Only report warnings and errors",
+    )
+    parser.add_argument(
+        "--log-format",
+        choices=LOG_FORMATS,
+        default="text",
+        help="Progress output: status line (text) or JSON records (default: text)",
+    )
+
+
+def build_scraper(
+    args: argparse.Namespace, progress: ProgressReporter, **options
+) -> AvatureScraper:
+    """Configure the parser registry and create the scraper from shared options."""
+    if args.parser_rules:
+        ParserRegistry.load_rules(args.parser_rules)
+    ParserRegistry.configure_cache(None if args.no_parser_cache else args.parser_cache)
+
+    description_transform = None
+    if args.clean_descriptions or args.description_format:
+        description_transform = DescriptionTransformer(
+            minify_html=args.clean_descriptions,
+            formats=tuple(args.description_format),
+        )
+    return AvatureScraper(
+        delay=args.delay,
+        workers=args.workers,
+        progress=progress,
+        description_transform=description_transform,
+        use_feed=not args.no_feed,
+        memory_budget=int(args.memory_budget * 2**20) if args.memory_budget else None,
+        stream_parse=args.stream_parse,
+        breaker_error_rate=args.breaker_error_rate,
+        breaker_streak=args.breaker_streak,
+        **options,
+    )
+
+
+def serve(argv: list[str]) -> int:
+    """`avature-scraper serve`: keep sites fresh with incremental refreshes."""
+    from .daemon import MAX_INTERVAL, MIN_INTERVAL
+    from .daemon import serve as run_daemon
+
+    parser = argparse.ArgumentParser(
+        prog="avature-scraper serve",
+        description="Refresh sites in the background on a per-site cadence",
     )
     parser.add_argument(
         "-i",
@@ -31,24 +222,95 @@ def main():
         "--output",
         type=Path,
         default=Path("output/jobs.jsonl"),
-        help="Output file for scraped jobs (default: output/jobs.jsonl)",
+        help="Output file new jobs are appended to (default: output/jobs.jsonl)",
     )
     parser.add_argument(
-        "--delay",
-        type=float,
-        default=1.5,
-        help="Delay between requests in seconds (default: 1.5)",
+        "--state",
+        type=Path,
+        default=Path("output/serve_state.json"),
+        help="Schedule and known jobs per site (default: output/serve_state.json)",
     )
     parser.add_argument(
-        "--workers",
+        "--port",
         type=int,
-        default=1,
-        help="Number of parallel workers for fetching jobs (default: 1)",
+        default=8787,
+        help="Local port for /status and /metrics (default: 8787)",
+    )
+    parser.add_argument(
+        "--index",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_INDEX,
+        help=f"Also keep the full-text index up to date (default path: {DEFAULT_INDEX})",
     )
+    add_scraper_arguments(parser)
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=MIN_INTERVAL / 3600,
+        help=f"Shortest refresh interval in hours (default: {MIN_INTERVAL // 3600})",
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=MAX_INTERVAL / 3600,
+        help=f"Longest refresh interval in hours (default: {MAX_INTERVAL // 3600})",
+    )
+    args = parser.parse_args(argv)
+
+    if not args.input.exists():
+        print(f"Error: Input file not found: {args.input}")
+        return 1
+    urls = load_urls(args.input)
+    if not urls:
+        print("Error: No URLs found in input file")
+        return 1
+
+    progress = ProgressReporter(log_format=args.log_format, quiet=args.quiet)
+    set_reporter(progress)
+    scraper = build_scraper(args, progress)
+    run_daemon(
+        scraper,
+        urls,
+        args.output,
+        args.state,
+        args.port,
+        index_path=args.index,
+        min_interval=args.min_interval * 3600,
+        max_interval=args.max_interval * 3600,
+    )
+    return 0
+
+
+def main():
+    if sys.argv[1:2] == ["query"]:
+        return query(sys.argv[2:])
+    if sys.argv[1:2] == ["serve"]:
+        return serve(sys.argv[2:])
+
+    parser = argparse.ArgumentParser(
+        description="Scrape job postings from Avature-hosted career sites"
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        type=Path,
+        default=Path("input/sites.txt"),
+        help="Input file with Avature site URLs (default: input/sites.txt)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=Path("output/jobs.jsonl"),
+        help="Output file for scraped jobs (default: output/jobs.jsonl)",
+    )
+    add_scraper_arguments(parser)
     parser.add_argument(
         "--discover-only",
         action="store_true",
-        help="Only discover and count job URLs without scraping",
+        help="Dry run: print the run plan (jobs and estimated time per site) "
+        "without scraping",
     )
     parser.add_argument(
         "--discover-sources",
@@ -67,6 +329,102 @@ def main():
         default=50,
         help="Maximum number of sources to discover (default: 50)",
     )
+    parser.add_argument(
+        "--count",
+        action="store_true",
+        help="With --discover-sources, count jobs per validated site "
+        "(streams the whole sitemap instead of stopping at the first job)",
+    )
+    parser.add_argument(
+        "--query",
+        action="append",
+        dest="queries",
+        help="Google query for --discover-sources; repeatable "
+        "(default: built-in SearchJobs, JobDetail, locale and custom-domain variants)",
+    )
+    parser.add_argument(
+        "--search-sessions",
+        type=int,
+        default=3,
+        help="Browser sessions running discovery queries concurrently (default: 3)",
+    )
+    parser.add_argument(
+        "--discovery-cache",
+        type=Path,
+        default=Path("output/discovery_cache.json"),
+        help="Cache of search results, validation outcomes and redirects "
+        "(default: output/discovery_cache.json)",
+    )
+    parser.add_argument(
+        "--discovery-cache-ttl",
+        type=float,
+        default=DEFAULT_TTL_HOURS,
+        help="Hours before cached discovery entries expire "
+        f"(default: {DEFAULT_TTL_HOURS})",
+    )
+    parser.add_argument(
+        "--no-discovery-cache",
+        action="store_true",
+        help="Search and validate everything again, ignoring the cache",
+    )
+    parser.add_argument(
+        "--metadata-only",
+        action="store_true",
+        help="Harvest title, location and posting date from SearchJobs listing "
+        "pages instead of fetching every job detail page (no descriptions)",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Fetch and write every sitemap entry, even if the same job was seen "
+        "under another locale or portal",
+    )
+    parser.add_argument(
+        "--index",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_INDEX,
+        help="Also upsert jobs into a SQLite full-text index, searchable with "
+        f"`avature-scraper query` (default path: {DEFAULT_INDEX})",
+    )
+    parser.add_argument(
+        "--dead-letter",
+        type=Path,
+        help="JSONL file for jobs that ran out of retries "
+        "(default: next to the output, e.g. output/jobs.failed.jsonl)",
+    )
+    parser.add_argument(
+        "--quality-report",
+        type=Path,
+        help="JSON data-quality report, also the baseline for the next run of "
+        "the same mode (default: next to the output, e.g. "
+        "output/jobs.quality.json, or jobs.metadata-quality.json with "
+        "--metadata-only)",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Re-process only the jobs in the dead-letter file, appending to output",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time each pipeline stage (fetch, parse per parser, serialize, "
+        "waits) and print a breakdown at the end",
+    )
+    parser.add_argument(
+        "--profile-stacks",
+        type=Path,
+        metavar="PATH",
+        help="With --profile, also sample stacks per stage into a folded file "
+        "for flamegraph.pl or speedscope",
+    )
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=2.0,
+        help="Seconds between progress updates (default: 2.0)",
+    )
     args = parser.parse_args()
 
     # Automated source discovery mode
@@ -77,8 +435,19 @@ def main():
         print(f"Scanning up to {args.max_pages} Google search pages")
         print(f"Target: {args.max_results} sources\n")
 
+        cache = None
+        if not args.no_discovery_cache:
+            cache = DiscoveryCache(args.discovery_cache, args.discovery_cache_ttl)
+        known_sites = load_urls(args.input) if args.input.exists() else []
+
         discovered = run_discovery(
-            max_pages=args.max_pages, max_results=args.max_results
+            max_pages=args.max_pages,
+            max_results=args.max_results,
+            count_jobs=args.count,
+            cache=cache,
+            known_sites=known_sites,
+            queries=args.queries,
+            search_sessions=args.search_sessions,
         )
 
         if discovered:
@@ -100,6 +469,24 @@ def main():
 
         return 0
 
+    progress = ProgressReporter(
+        log_format=args.log_format,
+        interval=args.progress_interval,
+        quiet=args.quiet,
+    )
+    set_reporter(progress)
+
+    if args.retry_failed:
+        dead_letter_path = args.dead_letter or default_dead_letter_path(args.output)
+        if not dead_letter_path.exists():
+            print(f"Error: Dead-letter file not found: {dead_letter_path}")
+            return 1
+
+        scraper = build_scraper(args, progress)
+        scraper.retry_failed(dead_letter_path, args.output, args.index)
+        emit(f"Done! Output appended to: {args.output}", output=str(args.output))
+        return 0
+
     # Normal scraping modes
     if not args.input.exists():
         print(f"Error: Input file not found: {args.input}")
@@ -111,15 +498,26 @@ def main():
         print("Error: No URLs found in input file")
         return 1
 
-    print(f"Loaded {len(urls)} site(s)")
-    scraper = AvatureScraper(delay=args.delay, workers=args.workers)
+    emit(f"Loaded {len(urls)} site(s)", sites=len(urls))
+    profiler = None
+    if args.profile or args.profile_stacks:
+        profiler = StageProfiler(args.profile_stacks)
+    scraper = build_scraper(
+        args,
+        progress,
+        dedup=not args.no_dedup,
+        metadata_only=args.metadata_only,
+        profiler=profiler,
+    )
 
     if args.discover_only:
-        print("\nDiscovering job URLs...")
+        emit("\nPlanning (dry run)...")
         scraper.discover_all(urls)
     else:
-        scraper.scrape_all(urls, args.output)
-        print(f"Done! Output written to: {args.output}")
+        scraper.scrape_all(
+            urls, args.output, args.dead_letter, args.index, args.quality_report
+        )
+        emit(f"Done! Output written to: {args.output}", output=str(args.output))
 
     return 0
 
@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+
+RESPONSE_ESTIMATE = 256 * 1024  # Reserved when a response has no Content-Length
+RSS_SAMPLE_INTERVAL = 0.25
+
+
+class ByteBudget:
+    """
+    Caps the response bytes held by fetch/parse workers at once.
+
+    A worker reserves the expected size before reading a body and blocks
+    while the budget is used up; a response larger than the whole budget is
+    let through once nothing else is held. Reserving before any bytes are
+    held keeps workers from deadlocking on partial reservations.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self.peak = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, size: int) -> None:
+        with self._cond:
+            while self.used and self.used + size > self.limit:
+                self._cond.wait()
+            self._add(size)
+
+    def add(self, size: int) -> None:
+        """Account bytes beyond a reservation without blocking."""
+        with self._cond:
+            self._add(size)
+
+    def release(self, size: int) -> None:
+        with self._cond:
+            self.used -= size
+            self._cond.notify_all()
+
+    def _add(self, size: int) -> None:
+        self.used += size
+        self.peak = max(self.peak, self.used)
+
+
+def format_bytes(size: int) -> str:
+    if size < 2**20:
+        return f"{size / 2**10:.1f} KiB"
+    return f"{size / 2**20:.1f} MiB"
+
+
+def current_rss() -> int | None:
+    """Resident set size of this process in bytes, if the OS exposes it."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler:
+    """
+    Samples RSS in a background thread and keeps the peak per stage.
+
+    The scraper labels what it is doing with set_stage (sitemap, feed,
+    listing, jobs); each sample is attributed to the current stage.
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peaks: dict[str, int] = {}
+        self._stage = "startup"
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread or current_rss() is None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self.sample()
+
+    def set_stage(self, stage: str) -> None:
+        self.sample()  # Close out the previous stage
+        with self._lock:
+            self._stage = stage
+        self.sample()
+
+    def sample(self) -> None:
+        rss = current_rss()
+        if rss is None:
+            return
+        with self._lock:
+            self.peaks[self._stage] = max(self.peaks.get(self._stage, 0), rss)
+
+    def summary(self) -> str:
+        stages = ", ".join(
+            f"{stage} {format_bytes(rss)}" for stage, rss in self.peaks.items()
+        )
+        return f"Peak RSS by stage: {stages}"
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
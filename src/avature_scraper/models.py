@@ -1,6 +1,8 @@
 from dataclasses import dataclass, field, asdict
 from typing import Any
 
+OPTIONAL_FIELDS = ("description_text", "description_markdown")
+
 
 @dataclass
 class Job:
@@ -11,6 +13,12 @@ class Job:
     posted_at: str | None = None
     metadata: dict[str, Any] = field(default_factory=dict)
     source_site: str = ""
+    description_text: str | None = None
+    description_markdown: str | None = None
 
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        data = asdict(self)
+        for key in OPTIONAL_FIELDS:
+            if data[key] is None:
+                del data[key]
+        return data
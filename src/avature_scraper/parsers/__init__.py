@@ -1,4 +1,19 @@
 from .base import BaseJobParser
-from .registry import ParserRegistry, get_parser
+from .fingerprint import detect_template
+from .registry import (
+    ParserRegistry,
+    get_parser,
+    get_settled_parser,
+    record_parse_result,
+)
+from .rules import RuleBasedParser
 
-__all__ = ["BaseJobParser", "ParserRegistry", "get_parser"]
+__all__ = [
+    "BaseJobParser",
+    "ParserRegistry",
+    "RuleBasedParser",
+    "detect_template",
+    "get_parser",
+    "get_settled_parser",
+    "record_parse_result",
+]
@@ -9,33 +9,43 @@ class BaseJobParser(ABC):
     """Base class for job parsers with common extraction utilities."""
 
     FIELD_MAPPINGS: dict[str, str] = {}
+    # Markers in the raw HTML that identify this parser's template
+    FINGERPRINT: tuple[str, ...] = ()
+    # Classes of the elements the extractors read; with streaming, the body
+    # is only downloaded until all of them have been closed (empty: all of it)
+    STREAM_REGIONS: tuple[str, ...] = ()
 
     def parse(
         self, html: str, url: str, posted_at: str | None, source_site: str
     ) -> Job | None:
         soup = BeautifulSoup(html, "lxml")
-
-        title = self._extract_title(soup)
-        description = self._extract_description(soup)
-
-        if self._is_error_page(title, description):
-            return None
-
-        metadata = self._extract_metadata(soup)
-        location = self._extract_location(soup, metadata)
-
-        if "location" in metadata:
-            del metadata["location"]
-
-        return Job(
-            title=title,
-            description=description,
-            apply_url=url,
-            location=location,
-            posted_at=posted_at or metadata.pop("posted_at", None),
-            metadata=metadata,
-            source_site=source_site,
-        )
+        try:
+            title = self._extract_title(soup)
+            description = self._extract_description(soup)
+
+            if self._is_error_page(title, description):
+                return None
+
+            metadata = self._extract_metadata(soup)
+            location = self._extract_location(soup, metadata)
+
+            if "location" in metadata:
+                del metadata["location"]
+
+            return Job(
+                title=title,
+                description=description,
+                apply_url=url,
+                location=location,
+                # posted_at (e.g. the feed's RFC 822 date) wins, so one output
+                # keeps one format; a date on the page only fills gaps
+                posted_at=posted_at or metadata.pop("posted_at", None),
+                metadata=metadata,
+                source_site=source_site,
+            )
+        finally:
+            # Free the tree now rather than whenever the garbage collector runs
+            soup.decompose()
 
     def _is_error_page(self, title: str, description: str) -> bool:
         return "error" in title.lower() and not description.strip()
@@ -1,34 +1,24 @@
-from bs4 import BeautifulSoup
+from typing import ClassVar
 
-from .base import BaseJobParser
+from .rules import RuleBasedParser
 
 
-class BaufestParser(BaseJobParser):
+class BaufestParser(RuleBasedParser):
     """Parser for Baufest-style portal structure (custom template)."""
 
-    def _extract_title(self, soup: BeautifulSoup) -> str:
-        return self._extract_title_from_tag(soup)
-
-    def _extract_description(self, soup: BeautifulSoup) -> str:
-        desc_el = soup.select_one(".jobDescription")
-        if desc_el:
-            return str(desc_el)
-        return ""
-
-    def _extract_metadata(self, soup: BeautifulSoup) -> dict:
-        metadata = {}
-
-        for label_el in soup.select(".jobInfoLabel"):
-            text = label_el.get_text(strip=True)
-            if text.startswith("Ref#:"):
-                metadata["ref_id"] = text.replace("Ref#:", "").strip()
-            elif text.startswith("Ref #:"):
-                metadata["ref_id"] = text.replace("Ref #:", "").strip()
-
-        return metadata
-
-    def _extract_location(self, soup: BeautifulSoup, metadata: dict) -> str | None:
-        loc_el = soup.select_one(".jobInfoLocation")
-        if loc_el:
-            return loc_el.get_text(strip=True)
-        return None
+    FINGERPRINT = (
+        "jobDescription",
+        "jobInfoLocation",
+        "jobInfoLabel",
+    )
+
+    STREAM_REGIONS = ("jobInfo", "jobDescription")
+
+    RULES: ClassVar[dict[str, list[dict]]] = {
+        "title": [{"title_tag": True}],
+        "description": [{"select": ".jobDescription", "html": True}],
+        "location": [{"select": ".jobInfoLocation"}],
+        "metadata": [
+            {"select": ".jobInfoLabel", "pattern": r"Ref ?#:(.*)", "key": "ref_id"},
+        ],
+    }
@@ -0,0 +1,59 @@
+import re
+
+from .base import BaseJobParser
+
+# Only the head of the page is scanned; template markers appear well before
+# the footer and inline scripts
+FINGERPRINT_SCAN_BYTES = 64 * 1024
+
+# "tag.class": a class token on that element's opening tag
+_TAGGED_MARKER = re.compile(r"([a-z][a-z0-9]*)\.([\w-]+)")
+
+_marker_patterns: dict[str, re.Pattern] = {}
+
+
+def _marker_pattern(marker: str) -> re.Pattern:
+    if marker not in _marker_patterns:
+        token = _TAGGED_MARKER.fullmatch(marker)
+        if token:
+            # Structural: <body class="tpt"> matches body.tpt, while the
+            # same word in text or on another element does not
+            tag, name = token.groups()
+            pattern = (
+                rf"<(?i:{tag})\b[^>]*\bclass=[\"'][^\"']*"
+                rf"(?<![\w-]){re.escape(name)}(?![\w-])"
+            )
+        else:
+            # A whole class token or attribute value: article__content must
+            # not match inside article__content__view__field__label
+            pattern = rf"(?<![\w-]){re.escape(marker)}(?![\w-])"
+        _marker_patterns[marker] = re.compile(pattern)
+    return _marker_patterns[marker]
+
+
+def fingerprint_score(html: str, parser_class: type[BaseJobParser]) -> float:
+    """Fraction of the parser's FINGERPRINT markers present in the page."""
+    markers = parser_class.FINGERPRINT
+    if not markers:
+        return 0.0
+    head = html[:FINGERPRINT_SCAN_BYTES]
+    found = sum(bool(_marker_pattern(marker).search(head)) for marker in markers)
+    return found / len(markers)
+
+
+def detect_template(
+    html: str, candidates: list[type[BaseJobParser]]
+) -> type[BaseJobParser] | None:
+    """
+    Pick the parser whose template markers best match the page.
+
+    Candidates are ordered from most to least specific: on a tie the earlier
+    one wins, so a page carrying both the generic and the specific markers of
+    a template goes to the specific parser. Returns None if nothing matches.
+    """
+    best, best_score = None, 0.0
+    for parser_class in candidates:
+        score = fingerprint_score(html, parser_class)
+        if score > best_score:
+            best, best_score = parser_class, score
+    return best
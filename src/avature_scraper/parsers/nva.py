@@ -1,36 +1,31 @@
-from bs4 import BeautifulSoup
+from typing import ClassVar
 
-from .base import BaseJobParser
+from .rules import RuleBasedParser
 
 
-class NVAParser(BaseJobParser):
+class NVAParser(RuleBasedParser):
     """Parser for NVA Jobs portal (custom detail template)."""
 
-    def _extract_title(self, soup: BeautifulSoup) -> str:
-        og_title = soup.find("meta", property="og:title")
-        if og_title and og_title.get("content"):
-            return og_title["content"]
-        return self._extract_title_from_tag(soup)
-
-    def _extract_description(self, soup: BeautifulSoup) -> str:
-        desc = soup.select_one(".detailDescription")
-        if desc:
-            return str(desc)
-
-        og_desc = soup.find("meta", property="og:description")
-        if og_desc and og_desc.get("content"):
-            return og_desc["content"]
-
-        return ""
-
-    def _extract_metadata(self, soup: BeautifulSoup) -> dict:
-        return {}
-
-    def _extract_location(self, soup: BeautifulSoup, metadata: dict) -> str | None:
-        for fieldset in soup.select(".detailData .fieldSet"):
-            label = fieldset.select_one(".fieldSetLabel")
-            value = fieldset.select_one(".fieldSetValue")
-            if label and value:
-                if "location" in label.get_text(strip=True).lower():
-                    return value.get_text(strip=True)
-        return None
+    FINGERPRINT = (
+        "detailDescription",
+        "detailData",
+        "fieldSetValue",
+    )
+
+    STREAM_REGIONS = ("detailData", "detailDescription")
+
+    RULES: ClassVar[dict[str, list[dict]]] = {
+        "title": [{"meta": "og:title"}, {"title_tag": True}],
+        "description": [
+            {"select": ".detailDescription", "html": True},
+            {"meta": "og:description"},
+        ],
+        "location": [
+            {
+                "select": ".detailData .fieldSet",
+                "label": ".fieldSetLabel",
+                "value": ".fieldSetValue",
+                "label_contains": "location",
+            },
+        ],
+    }
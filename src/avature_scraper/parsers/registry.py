@@ -1,9 +1,17 @@
+import json
+import threading
+from collections import Counter, deque
+from datetime import UTC, datetime
+from pathlib import Path
 from urllib.parse import urlparse
 
+from ..progress import emit
 from .base import BaseJobParser
 from .baufest import BaufestParser
+from .fingerprint import detect_template
 from .gps import GPSHospitalityParser
 from .nva import NVAParser
+from .rules import load_rule_parsers
 from .standard import StandardAvatureParser
 
 DOMAIN_PARSERS: dict[str, type[BaseJobParser]] = {
@@ -12,32 +20,252 @@ DOMAIN_PARSERS: dict[str, type[BaseJobParser]] = {
     "nva.avature.net": NVAParser,
 }
 
+# Fingerprinting candidates, most specific template first (custom
+# templates, then the generic standard one)
+TEMPLATE_PARSERS: list[type[BaseJobParser]] = [
+    BaufestParser,
+    NVAParser,
+    GPSHospitalityParser,
+    StandardAvatureParser,
+]
+
+DETECTION_SAMPLES = 3  # Pages fingerprinted before a domain's choice is fixed
+FAILURE_WINDOW = 20  # Recent parse outcomes kept per domain
+FAILURE_THRESHOLD = 0.5  # Failure rate over a full window that triggers re-detection
+
 _parser_cache: dict[str, BaseJobParser] = {}
+_lock = threading.Lock()
+_votes: dict[str, Counter] = {}
+_outcomes: dict[str, deque[bool]] = {}
+_selections: dict[str, type[BaseJobParser]] = {}
+_instances: dict[type[BaseJobParser], BaseJobParser] = {}
+_PARSERS_BY_NAME = {cls.__name__: cls for cls in TEMPLATE_PARSERS}
+
+
+class ParserSelectionCache:
+    """JSON file remembering which parser was detected for each domain."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.selections: dict[str, dict] = {}
+        self._lock = threading.Lock()  # Writers only; separate from _lock
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.selections = json.load(f)
+
+    def get(self, domain: str) -> type[BaseJobParser] | None:
+        entry = self.selections.get(domain)
+        if not entry:
+            return None
+        return _PARSERS_BY_NAME.get(entry["parser"])
+
+    def set(self, domain: str, parser_class: type[BaseJobParser], samples: int):
+        with self._lock:
+            self.selections[domain] = {
+                "parser": parser_class.__name__,
+                "samples": samples,
+                "detected_at": datetime.now(UTC).isoformat(),
+            }
+            self.save()
+
+    def remove(self, domain: str):
+        with self._lock:
+            if self.selections.pop(domain, None):
+                self.save()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.selections, f, indent=2, sort_keys=True)
+        tmp.replace(self.path)
+
+
+_selection_cache: ParserSelectionCache | None = None
 
 
 class ParserRegistry:
-    """Registry for domain-specific parsers."""
+    """
+    Registry for domain-specific parsers.
+
+    Domains in DOMAIN_PARSERS are pinned. For any other domain the first
+    DETECTION_SAMPLES pages are fingerprinted and the majority template is
+    fixed for the domain (and persisted if a selection cache is configured).
+    If parse failures then spike, the choice is dropped and re-detected.
+
+    The module lock only guards the in-memory state; the selection cache
+    file is written and messages are emitted after it is released, so
+    workers never wait on disk or stdout to get a parser.
+    """
+
+    @staticmethod
+    def get_parser(domain: str, html: str | None = None) -> BaseJobParser:
+        with _lock:
+            if domain in DOMAIN_PARSERS or domain in _selections or html is None:
+                return ParserRegistry._instance(domain)
+
+            detected = detect_template(html, TEMPLATE_PARSERS)
+            votes = _votes.setdefault(domain, Counter())
+            votes[detected] += 1
+            samples = sum(votes.values())
+            majority, count = votes.most_common(1)[0]
+            settled = samples >= DETECTION_SAMPLES
+            if settled:
+                ParserRegistry._select(domain, majority)
+            parser = _instance_for(detected or StandardAvatureParser)
+            cache = _selection_cache
+
+        if settled:
+            ParserRegistry._announce(domain, majority, count, samples, cache)
+        return parser
+
+    @staticmethod
+    def get_settled_parser(domain: str) -> BaseJobParser | None:
+        """The parser fixed for a domain, or None while it is still detected."""
+        with _lock:
+            if domain in DOMAIN_PARSERS or domain in _selections:
+                return ParserRegistry._instance(domain)
+            return None
+
+    @staticmethod
+    def record_result(domain: str, ok: bool) -> None:
+        """Track a parse outcome; re-detect the template if failures spike."""
+        with _lock:
+            if domain in DOMAIN_PARSERS or domain not in _selections:
+                return
+            outcomes = _outcomes.setdefault(domain, deque(maxlen=FAILURE_WINDOW))
+            outcomes.append(ok)
+            if len(outcomes) < FAILURE_WINDOW:
+                return
+            failure_rate = outcomes.count(False) / len(outcomes)
+            if failure_rate < FAILURE_THRESHOLD:
+                return
+
+            parser_class = _selections.pop(domain)
+            _parser_cache.pop(domain, None)
+            _votes.pop(domain, None)
+            outcomes.clear()
+            cache = _selection_cache
+
+        if cache:
+            cache.remove(domain)
+        emit(
+            f"  {failure_rate:.0%} parse failures on {domain} with "
+            f"{parser_class.__name__}, re-detecting template",
+            level="warning",
+            domain=domain,
+            parser=parser_class.__name__,
+            failure_rate=failure_rate,
+        )
+
+    @staticmethod
+    def register(domain: str, parser_class: type[BaseJobParser]):
+        with _lock:
+            DOMAIN_PARSERS[domain] = parser_class
+            if domain in _parser_cache:
+                del _parser_cache[domain]
 
     @staticmethod
-    def get_parser(domain: str) -> BaseJobParser:
+    def load_rules(path: str | Path) -> list[type[BaseJobParser]]:
+        """
+        Register the rule-based parsers defined in a JSON rules file.
+
+        Each parser is pinned to its domains and, if it has a fingerprint,
+        becomes a detection candidate ahead of the built-in templates.
+        """
+        parsers = load_rule_parsers(path)
+        with _lock:
+            for parser_class, domains in parsers.items():
+                _PARSERS_BY_NAME[parser_class.__name__] = parser_class
+                if parser_class.FINGERPRINT:
+                    TEMPLATE_PARSERS.insert(0, parser_class)
+                for domain in domains:
+                    DOMAIN_PARSERS[domain] = parser_class
+                    _parser_cache.pop(domain, None)
+        return list(parsers)
+
+    @staticmethod
+    def configure_cache(path: str | Path | None) -> None:
+        """Load (or disable, with None) the persisted parser selections."""
+        global _selection_cache
+        with _lock:
+            _selection_cache = ParserSelectionCache(path) if path else None
+            _selections.clear()
+            _parser_cache.clear()
+            _votes.clear()
+            _outcomes.clear()
+            if _selection_cache:
+                for domain in _selection_cache.selections:
+                    parser_class = _selection_cache.get(domain)
+                    if parser_class:
+                        _selections[domain] = parser_class
+
+    @staticmethod
+    def _instance(domain: str) -> BaseJobParser:
         if domain in _parser_cache:
             return _parser_cache[domain]
 
-        parser_class = DOMAIN_PARSERS.get(domain, StandardAvatureParser)
-        parser = parser_class()
+        parser_class = DOMAIN_PARSERS.get(domain) or _selections.get(
+            domain, StandardAvatureParser
+        )
+        parser = _instance_for(parser_class)
         _parser_cache[domain] = parser
         return parser
 
     @staticmethod
-    def register(domain: str, parser_class: type[BaseJobParser]):
-        DOMAIN_PARSERS[domain] = parser_class
-        if domain in _parser_cache:
-            del _parser_cache[domain]
+    def _select(domain: str, detected: type[BaseJobParser] | None) -> None:
+        """Fix the detected template for a domain; called under _lock."""
+        _selections[domain] = detected or StandardAvatureParser
+        _parser_cache.pop(domain, None)
+        _votes.pop(domain, None)
+
+    @staticmethod
+    def _announce(
+        domain: str,
+        detected: type[BaseJobParser] | None,
+        count: int,
+        samples: int,
+        cache: ParserSelectionCache | None,
+    ) -> None:
+        """Persist and report a selection made by _select, outside _lock."""
+        parser_class = detected or StandardAvatureParser
+        if detected is None:
+            emit(
+                f"  No known template detected on {domain}, "
+                "falling back to StandardAvatureParser",
+                level="warning",
+                domain=domain,
+            )
+        if cache:
+            cache.set(domain, parser_class, samples)
+        emit(
+            f"  Detected {parser_class.__name__} for {domain} "
+            f"({count}/{samples} pages)",
+            level="info",
+            domain=domain,
+            parser=parser_class.__name__,
+        )
 
 
-def get_parser(url_or_domain: str) -> BaseJobParser:
+def _instance_for(parser_class: type[BaseJobParser]) -> BaseJobParser:
+    if parser_class not in _instances:
+        _instances[parser_class] = parser_class()
+    return _instances[parser_class]
+
+
+def _domain(url_or_domain: str) -> str:
     if url_or_domain.startswith("http"):
-        domain = urlparse(url_or_domain).netloc
-    else:
-        domain = url_or_domain
-    return ParserRegistry.get_parser(domain)
+        return urlparse(url_or_domain).netloc
+    return url_or_domain
+
+
+def get_parser(url_or_domain: str, html: str | None = None) -> BaseJobParser:
+    return ParserRegistry.get_parser(_domain(url_or_domain), html)
+
+
+def get_settled_parser(url_or_domain: str) -> BaseJobParser | None:
+    return ParserRegistry.get_settled_parser(_domain(url_or_domain))
+
+
+def record_parse_result(url_or_domain: str, ok: bool) -> None:
+    ParserRegistry.record_result(_domain(url_or_domain), ok)
@@ -0,0 +1,219 @@
+import json
+import re
+from collections.abc import Callable
+from pathlib import Path
+from typing import ClassVar
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+from .base import BaseJobParser
+
+# A compiled rule: (parser, soup, metadata) -> value, or None if not found
+Extractor = Callable[[BaseJobParser, BeautifulSoup, dict], str | None]
+
+RULE_FIELDS = ("title", "description", "location", "metadata")
+
+
+class RuleBasedParser(BaseJobParser):
+    """
+    Parser driven by declarative extraction rules.
+
+    RULES maps title, description and location to alternatives, tried in
+    order until one finds its element, and metadata to rules that all
+    apply. They are compiled once per class into soupsieve selectors and
+    regular expressions:
+
+        {"meta": "og:title"}        content of <meta property=...>, if set
+        {"title_tag": true}         <title> up to " - " or " | "
+        {"select": css}             text of the first match; with
+                                    "html": true, its markup
+        {"select": css, "label": css, "value": css, "label_contains": text}
+                                    value of the first row whose label
+                                    contains text (case-insensitive)
+        {"metadata": [keys], "join": sep}
+                                    location from metadata values, which
+                                    are removed from the metadata
+
+    Metadata rules:
+
+        {"select": css, "pattern": regex, "key": key}
+                                    first group of the pattern, matched
+                                    against each element's text
+        {"select": css, "labels": {prefix: key}, "cut": sep}
+                                    text after each prefix up to the next
+                                    one, found in a single regex scan
+    """
+
+    RULES: ClassVar[dict[str, list[dict]]] = {}
+    _compiled: ClassVar[dict[str, list[Extractor]]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._compiled = {
+            field: [compile_rule(rule) for rule in cls.RULES.get(field, ())]
+            for field in RULE_FIELDS
+        }
+
+    def _extract_title(self, soup: BeautifulSoup) -> str:
+        title = self._first("title", soup, {})
+        return "" if title is None else title
+
+    def _extract_description(self, soup: BeautifulSoup) -> str:
+        description = self._first("description", soup, {})
+        return "" if description is None else description
+
+    def _extract_metadata(self, soup: BeautifulSoup) -> dict:
+        metadata = {}
+        for extract in self._compiled["metadata"]:
+            extract(self, soup, metadata)
+        return metadata
+
+    def _extract_location(self, soup: BeautifulSoup, metadata: dict) -> str | None:
+        return self._first("location", soup, metadata)
+
+    def _first(self, field: str, soup: BeautifulSoup, metadata: dict) -> str | None:
+        for extract in self._compiled[field]:
+            value = extract(self, soup, metadata)
+            if value is not None:
+                return value
+        return None
+
+
+def compile_rule(rule: dict) -> Extractor:
+    """Compile one rule into an extractor (see RuleBasedParser)."""
+    if "meta" in rule:
+        meta = soupsieve.compile(f'meta[property="{rule["meta"]}"]')
+
+        def extract(parser, soup, metadata):
+            tag = meta.select_one(soup)
+            return tag["content"] if tag and tag.get("content") else None
+
+    elif rule.get("title_tag"):
+
+        def extract(parser, soup, metadata):
+            return parser._extract_title_from_tag(soup)
+
+    elif "metadata" in rule:
+        keys, separator = rule["metadata"], rule.get("join", ", ")
+
+        def extract(parser, soup, metadata):
+            parts = [metadata.pop(key) for key in keys if key in metadata]
+            return separator.join(parts) if parts else None
+
+    elif "labels" in rule:
+        return _compile_labels(rule)
+    elif "pattern" in rule:
+        elements = soupsieve.compile(rule["select"])
+        pattern, key = re.compile(rule["pattern"]), rule["key"]
+
+        def extract(parser, soup, metadata):
+            for element in elements.select(soup):
+                match = pattern.match(element.get_text(strip=True))
+                if match:
+                    metadata[key] = match.group(1).strip()
+
+    elif "label" in rule:
+        rows = soupsieve.compile(rule["select"])
+        label = soupsieve.compile(rule["label"])
+        value = soupsieve.compile(rule["value"])
+        needle = rule["label_contains"].lower()
+
+        def extract(parser, soup, metadata):
+            for row in rows.select(soup):
+                label_el, value_el = label.select_one(row), value.select_one(row)
+                if (
+                    label_el
+                    and value_el
+                    and needle in label_el.get_text(strip=True).lower()
+                ):
+                    return value_el.get_text(strip=True)
+            return None
+
+    elif "select" in rule:
+        element = soupsieve.compile(rule["select"])
+        as_html = rule.get("html", False)
+
+        def extract(parser, soup, metadata):
+            el = element.select_one(soup)
+            if el is None:
+                return None
+            return str(el) if as_html else el.get_text(strip=True)
+
+    else:
+        raise ValueError(f"Unknown extraction rule: {rule}")
+    return extract
+
+
+def _compile_labels(rule: dict) -> Extractor:
+    """
+    "Label: value" sections of one element's text.
+
+    A single alternation regex finds the first occurrence of every label;
+    each value runs to the next label found, so the text is scanned once
+    instead of once per pair of labels.
+    """
+    element = soupsieve.compile(rule["select"])
+    labels: dict[str, str] = rule["labels"]
+    cut = rule.get("cut")
+    pattern = re.compile("|".join(map(re.escape, labels)))
+
+    def extract(parser, soup, metadata):
+        el = element.select_one(soup)
+        if el is None:
+            return
+        text = el.get_text(strip=True)
+        starts: dict[str, int] = {}
+        for match in pattern.finditer(text):
+            starts.setdefault(match.group(), match.start())
+        positions = sorted(starts.values())
+        ends = dict(zip(positions, positions[1:] + [len(text)]))
+        for label, key in labels.items():
+            if label not in starts:
+                continue
+            value = text[starts[label] + len(label) : ends[starts[label]]].strip()
+            if value:
+                metadata[key] = value.split(cut)[0].strip() if cut else value
+
+    return extract
+
+
+def rule_parser(
+    name: str,
+    rules: dict[str, list[dict]],
+    fingerprint: tuple[str, ...] = (),
+    stream_regions: tuple[str, ...] = (),
+) -> type[RuleBasedParser]:
+    """Create a parser class from rules, e.g. ones loaded from JSON."""
+    return type(
+        name,
+        (RuleBasedParser,),
+        {
+            "__module__": __name__,
+            "__doc__": f"Rule-based parser {name} (configured template).",
+            "RULES": rules,
+            "FINGERPRINT": tuple(fingerprint),
+            "STREAM_REGIONS": tuple(stream_regions),
+        },
+    )
+
+
+def load_rule_parsers(path: str | Path) -> dict[type[RuleBasedParser], list[str]]:
+    """
+    Parser classes defined in a JSON rules file, with their domains.
+
+    The file maps parser names to {"domains": [...], "fingerprint": [...],
+    "stream_regions": [...], "rules": {...}}; all keys but rules are
+    optional.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    return {
+        rule_parser(
+            name,
+            entry["rules"],
+            entry.get("fingerprint", ()),
+            entry.get("stream_regions", ()),
+        ): entry.get("domains", [])
+        for name, entry in config.items()
+    }
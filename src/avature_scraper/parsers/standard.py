@@ -6,6 +6,14 @@ from .base import BaseJobParser
 class StandardAvatureParser(BaseJobParser):
     """Parser for standard Avature portal structure (most sites)."""
 
+    FINGERPRINT = (
+        "article__content__view__field__label",
+        "article__content__view__field__value",
+    )
+
+    # Every field is inside the job detail section
+    STREAM_REGIONS = ("section--jobDetail",)
+
     DESCRIPTION_LABELS = {
         "about the role",
         "what is in it for you",
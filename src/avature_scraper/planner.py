@@ -0,0 +1,126 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+import requests
+
+from .dedup import JobDeduplicator
+from .progress import format_duration
+
+PLAN_WORKERS = 8  # Sites resolved and sitemaps fetched concurrently
+DEFAULT_LATENCY = 0.5  # Seconds per request when a site's latency is unknown
+
+
+@dataclass
+class SitePlan:
+    url: str
+    site: str
+    final_url: str | None = None
+    job_urls: list[str] = field(default_factory=list, repr=False)
+    sitemap_jobs: int = 0
+    # Landing page round trip, a proxy for a JobDetail request
+    latency: float | None = None
+    error: str | None = None
+
+    @property
+    def jobs(self) -> int:
+        return len(self.job_urls)
+
+    @property
+    def duplicates(self) -> int:
+        return self.sitemap_jobs - self.jobs
+
+
+@dataclass
+class RunPlan:
+    """
+    Jobs per site, known before any job page is fetched.
+
+    Estimates assume each request takes the site's landing page latency
+    (plus --delay with a single worker) and that all workers are shared
+    across sites, so the run takes about the sum of the per-site work
+    divided by the number of workers.
+    """
+
+    sites: list[SitePlan]
+    workers: int
+    delay: float
+
+    @property
+    def total_jobs(self) -> int:
+        return sum(site.jobs for site in self.sites)
+
+    def estimate(self, site: SitePlan) -> float:
+        """Seconds of work for a site, spread over all workers."""
+        latency = site.latency or DEFAULT_LATENCY
+        if self.workers == 1:
+            return site.jobs * (latency + self.delay)
+        return site.jobs * latency / self.workers
+
+    def estimated_duration(self) -> float:
+        return sum(self.estimate(site) for site in self.sites)
+
+    def summary(self) -> str:
+        width = max((len(site.site) for site in self.sites), default=4)
+        lines = [f"{'Site':<{width}}  {'Jobs':>6}  {'Dupes':>6}  {'Latency':>8}  Est."]
+        for site in self.sites:
+            if site.error:
+                lines.append(f"{site.site:<{width}}  failed (see warning above)")
+                continue
+            latency = f"{site.latency * 1000:.0f} ms" if site.latency else "-"
+            lines.append(
+                f"{site.site:<{width}}  {site.jobs:>6}  {site.duplicates:>6}  "
+                f"{latency:>8}  {format_duration(self.estimate(site))}"
+            )
+        failed = sum(1 for site in self.sites if site.error)
+        lines.append(
+            f"Total: {self.total_jobs} jobs across {len(self.sites) - failed} "
+            f"site(s)" + (f", {failed} failed" if failed else "") + ", "
+            f"estimated {format_duration(self.estimated_duration())} "
+            f"with {self.workers} worker(s)"
+        )
+        return "\n".join(lines)
+
+
+def plan_run(
+    scraper,
+    urls: list[str],
+    dedup: JobDeduplicator | None = None,
+    workers: int = PLAN_WORKERS,
+) -> RunPlan:
+    """
+    Resolve every site and fetch its sitemap concurrently.
+
+    Sitemaps are streamed (see SitemapParser.fetch_groups), so only the job
+    URL groups of each site are held, not a document per worker.
+
+    Duplicates are then filtered in input order, as a sequential run would,
+    so a job listed by two portals is planned for the first one.
+    """
+    sites = [
+        SitePlan(url.rstrip("/"), urlparse(url.rstrip("/")).netloc) for url in urls
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        groups = list(executor.map(lambda site: _fetch_site(scraper, site), sites))
+
+    for site, site_groups in zip(sites, groups):
+        site.sitemap_jobs = len(site_groups)
+        if dedup:
+            site.job_urls = dedup.filter_groups(site_groups)
+        else:
+            site.job_urls = [group[0] for group in site_groups]
+
+    return RunPlan(sites, scraper.workers, scraper.delay)
+
+
+def _fetch_site(scraper, site: SitePlan) -> list[list[str]]:
+    sitemap = scraper._get_sitemap_parser()
+    try:
+        start = time.monotonic()
+        site.final_url = sitemap.resolve(site.url)
+        site.latency = time.monotonic() - start
+        return sitemap.fetch_groups(site.final_url)
+    except (requests.RequestException, RuntimeError) as e:
+        site.error = str(e)
+        return []
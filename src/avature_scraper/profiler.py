@@ -0,0 +1,129 @@
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+SAMPLE_INTERVAL = 0.005  # Seconds between stack samples
+MAX_STACK_DEPTH = 64
+
+
+class StageProfiler:
+    """
+    Wall-clock time per pipeline stage, with optional stack sampling.
+
+    Stages are timed with perf_counter around each call (fetch,
+    parse:<Parser>, serialize, ...), so the overhead is two clock reads per
+    stage. Time a worker thread spends in a stage adds up across threads,
+    so totals can exceed the run's wall time.
+
+    With stacks_path, a sampler thread reads sys._current_frames() every
+    SAMPLE_INTERVAL seconds. It records the stack of each thread that is
+    inside a stage, prefixed with the stage name, and writes the counts
+    in the folded format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(
+        self, stacks_path: str | Path | None = None, interval: float = SAMPLE_INTERVAL
+    ):
+        self.stacks_path = Path(stacks_path) if stacks_path else None
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self.wall = 0.0
+        self._totals: dict[str, list[float]] = {}  # stage -> [calls, seconds, max]
+        self._active: dict[int, list[str]] = {}  # thread id -> open stages
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started_at: float | None = None
+
+    @contextmanager
+    def stage(self, name: str):
+        stages = self._active.setdefault(threading.get_ident(), [])
+        stages.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+            stages.pop()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(name, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+
+    def start(self) -> None:
+        if self._started_at is not None:
+            return
+        self._started_at = time.perf_counter()
+        if self.stacks_path:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._sample, name="profiler", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop timing and sampling, and write the folded stacks if enabled."""
+        if self._started_at is None:
+            return
+        self.wall += time.perf_counter() - self._started_at
+        self._started_at = None
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self.stacks_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.stacks_path, "w", encoding="utf-8") as f:
+                f.writelines(
+                    f"{stack} {count}\n" for stack, count in self.samples.most_common()
+                )
+
+    def totals(self) -> dict[str, tuple[int, float, float]]:
+        """(calls, seconds, max seconds) per stage."""
+        with self._lock:
+            return {name: tuple(totals) for name, totals in self._totals.items()}
+
+    def summary(self) -> str:
+        totals = sorted(self.totals().items(), key=lambda item: -item[1][1])
+        overall = sum(seconds for _, seconds, _ in dict(totals).values()) or 1.0
+        width = max((len(name) for name, _ in totals), default=5)
+        lines = [
+            (
+                f"{'Stage':<{width}}  {'Calls':>7}  {'Total':>8}  {'Mean':>8}  "
+                f"{'Max':>8}  Share"
+            )
+        ]
+        for name, (calls, seconds, longest) in totals:
+            lines.append(
+                f"{name:<{width}}  {calls:>7}  {seconds:>7.2f}s  "
+                f"{seconds / calls * 1000:>6.1f}ms  {longest * 1000:>6.0f}ms  "
+                f"{seconds / overall:>5.0%}"
+            )
+        lines.append(f"Wall time {self.wall:.2f}s (stage times add up across threads)")
+        if self.stacks_path:
+            lines.append(
+                f"{sum(self.samples.values())} stack samples written to "
+                f"{self.stacks_path}"
+            )
+        return "\n".join(lines)
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                stages = self._active.get(ident)
+                if ident == me or not stages:
+                    continue
+                names = []
+                while frame is not None and len(names) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    module = frame.f_globals.get("__name__", "?")
+                    names.append(f"{module}.{code.co_qualname}")
+                    frame = frame.f_back
+                names.extend(reversed(stages))
+                self.samples[";".join(reversed(names))] += 1
@@ -0,0 +1,250 @@
+import json
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+LOG_FORMATS = ("text", "json")
+LEVELS = {"info": 0, "warning": 1, "error": 2}
+
+
+@dataclass
+class HostProgress:
+    total: int = 0
+    done: int = 0
+    failed: int = 0
+    in_flight: int = 0
+    retrying: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def finished(self) -> int:
+        return self.done + self.failed
+
+    def rate(self, now: float) -> float:
+        elapsed = now - self.started_at
+        return self.finished / elapsed if elapsed > 0 else 0.0
+
+    def eta(self, now: float) -> float | None:
+        rate = self.rate(now)
+        remaining = self.total - self.finished
+        if rate <= 0 or remaining <= 0:
+            return None
+        return remaining / rate
+
+
+class ProgressReporter:
+    """
+    Aggregates per-host job counts and reports them at a fixed interval.
+
+    Workers only update counters under a lock; a background thread renders
+    a single status line (text) or one record per active host (json) every
+    `interval` seconds. Quiet mode only lets warnings and errors through.
+    """
+
+    def __init__(
+        self,
+        log_format: str = "text",
+        interval: float = 2.0,
+        quiet: bool = False,
+        stream=None,
+    ):
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"Unknown log format: {log_format}")
+        self.log_format = log_format
+        self.interval = interval
+        self.quiet = quiet
+        self.stream = stream or sys.stdout
+        self._hosts: dict[str, HostProgress] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._status_width = 0
+        self._interactive = log_format == "text" and self.stream.isatty()
+
+    def start(self) -> None:
+        """Start the periodic refresh thread."""
+        if self.quiet or self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the refresh thread and render the final state."""
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self.render()
+            with self._lock:
+                if self._interactive and self._status_width:
+                    self.stream.write("\n")
+                    self._status_width = 0
+
+    def start_host(self, host: str, total: int) -> None:
+        with self._lock:
+            self._hosts[host] = HostProgress(total=total)
+
+    def job_started(self, host: str, retry: bool = False) -> None:
+        with self._lock:
+            progress = self._get_host(host)
+            progress.in_flight += 1
+            if retry:
+                progress.retrying = max(0, progress.retrying - 1)
+
+    def job_deferred(self, host: str) -> None:
+        """Move a job from in flight to waiting for its retry."""
+        with self._lock:
+            progress = self._get_host(host)
+            progress.in_flight = max(0, progress.in_flight - 1)
+            progress.retrying += 1
+
+    def job_finished(self, host: str, ok: bool) -> None:
+        with self._lock:
+            progress = self._get_host(host)
+            progress.in_flight = max(0, progress.in_flight - 1)
+            if ok:
+                progress.done += 1
+            else:
+                progress.failed += 1
+
+    def job_skipped(self, host: str, retry: bool = False) -> None:
+        """Count a queued job as failed without fetching it."""
+        with self._lock:
+            progress = self._get_host(host)
+            progress.failed += 1
+            if retry:
+                progress.retrying = max(0, progress.retrying - 1)
+
+    def snapshot(self) -> dict[str, HostProgress]:
+        with self._lock:
+            return {
+                host: HostProgress(**vars(progress))
+                for host, progress in self._hosts.items()
+            }
+
+    def log(self, message: str, level: str = "info", **fields) -> None:
+        """Write an event message, keeping the status line intact."""
+        if self.quiet and LEVELS[level] < LEVELS["warning"]:
+            return
+
+        if self.log_format == "json":
+            self._write_json(
+                {"event": "log", "level": level, "message": message.strip(), **fields}
+            )
+            return
+
+        with self._lock:
+            self._clear_status()
+            self.stream.write(message + "\n")
+            self.stream.flush()
+
+    def render(self) -> None:
+        """Write the current per-host state once."""
+        if self.quiet:
+            return
+
+        now = time.monotonic()
+        hosts = self.snapshot()
+        active = [
+            (host, progress)
+            for host, progress in hosts.items()
+            if progress.in_flight
+            or progress.retrying
+            or progress.finished < progress.total
+        ] or list(hosts.items())[-1:]
+
+        if self.log_format == "json":
+            for host, progress in active:
+                eta = progress.eta(now)
+                self._write_json(
+                    {
+                        "event": "progress",
+                        "host": host,
+                        "total": progress.total,
+                        "done": progress.done,
+                        "failed": progress.failed,
+                        "in_flight": progress.in_flight,
+                        "retrying": progress.retrying,
+                        "rate": round(progress.rate(now), 2),
+                        "eta_s": round(eta) if eta is not None else None,
+                    }
+                )
+            return
+
+        line = " | ".join(self._format_host(host, p, now) for host, p in active)
+        if not line:
+            return
+
+        with self._lock:
+            if self._interactive:
+                padding = max(0, self._status_width - len(line))
+                self.stream.write("\r" + line + " " * padding)
+                self._status_width = len(line)
+            else:
+                self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.render()
+
+    def _get_host(self, host: str) -> HostProgress:
+        if host not in self._hosts:
+            self._hosts[host] = HostProgress()
+        return self._hosts[host]
+
+    def _format_host(self, host: str, progress: HostProgress, now: float) -> str:
+        eta = progress.eta(now)
+        eta_str = f"ETA {format_duration(eta)}" if eta is not None else "ETA -"
+        return (
+            f"{host} {progress.finished}/{progress.total} "
+            f"({progress.failed} failed, {progress.in_flight} in flight, "
+            f"{progress.retrying} retrying, "
+            f"{progress.rate(now):.1f}/s, {eta_str})"
+        )
+
+    def _clear_status(self) -> None:
+        if self._interactive and self._status_width:
+            self.stream.write("\r" + " " * self._status_width + "\r")
+            self._status_width = 0
+
+    def _write_json(self, record: dict) -> None:
+        record = {"ts": datetime.now(UTC).isoformat(), **record}
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+
+_reporter: ProgressReporter | None = None
+
+
+def set_reporter(reporter: ProgressReporter | None) -> None:
+    """Route emit() calls through the given reporter."""
+    global _reporter
+    _reporter = reporter
+
+
+def get_reporter() -> ProgressReporter | None:
+    return _reporter
+
+
+def emit(message: str, level: str = "info", **fields) -> None:
+    """Log an event through the active reporter, or print it if none is set."""
+    if _reporter:
+        _reporter.log(message, level, **fields)
+    else:
+        print(message)
@@ -0,0 +1,248 @@
+import json
+import threading
+from collections import Counter, deque
+from datetime import UTC, datetime
+from pathlib import Path
+
+from .models import Job
+from .progress import emit
+
+FIELDS = ("title", "description", "location", "posted_at", "metadata")
+PARSE_ERROR = "parse error"  # Parser returned no job (_is_error_page)
+QUALITY_WINDOW = 50  # Recent outcomes per site compared against the baseline
+DROP_THRESHOLD = 0.25  # Coverage fall (absolute) over a window that is flagged
+FULL = "full"
+METADATA_ONLY = "metadata-only"  # No descriptions by design (--metadata-only)
+
+
+class SiteQuality:
+    """Running aggregates for one site, plus a window of recent outcomes."""
+
+    def __init__(self, baseline: dict[str, float] | None = None):
+        self.jobs = 0
+        self.present: Counter[str] = Counter()
+        self.failed: Counter[str] = Counter()
+        self.length_total = 0
+        self.length_min: int | None = None
+        self.length_max = 0
+        # Description lengths by bit length: bucket k holds 2^(k-1) <= n < 2^k
+        self.length_buckets: Counter[int] = Counter()
+        self.baseline = baseline
+        self.recent: deque[frozenset[str] | None] = deque(maxlen=QUALITY_WINDOW)
+        self.flagged: set[str] = set()
+
+    @property
+    def outcomes(self) -> int:
+        return self.jobs + sum(self.failed.values())
+
+    def add_job(self, job: Job) -> None:
+        present = frozenset(field for field in FIELDS if getattr(job, field))
+        self.jobs += 1
+        self.present.update(present)
+        length = len(job.description or "")
+        self.length_total += length
+        self.length_min = (
+            length if self.length_min is None else min(self.length_min, length)
+        )
+        self.length_max = max(self.length_max, length)
+        self.length_buckets[length.bit_length()] += 1
+        self.recent.append(present)
+
+    def add_failure(self, reason: str) -> None:
+        self.failed[reason] += 1
+        if reason == PARSE_ERROR:
+            self.recent.append(None)
+
+    def window_rates(self) -> dict[str, float]:
+        """
+        Error-page rate over the recent window, plus field coverage if the
+        window has any jobs.
+        """
+        jobs = [present for present in self.recent if present is not None]
+        rates = {}
+        if jobs:
+            for field in FIELDS:
+                rates[field] = sum(field in present for present in jobs) / len(jobs)
+        rates[PARSE_ERROR] = (len(self.recent) - len(jobs)) / len(self.recent)
+        return rates
+
+    def percentile(self, fraction: float) -> int:
+        """Upper bound of the length bucket holding the given fraction of jobs."""
+        target = fraction * self.jobs
+        seen = 0
+        for bucket in sorted(self.length_buckets):
+            seen += self.length_buckets[bucket]
+            if seen >= target:
+                return 2**bucket - 1
+        return 0
+
+    def report(self) -> dict:
+        outcomes = self.outcomes or 1
+        return {
+            "jobs": self.jobs,
+            "coverage": {
+                field: round(self.present[field] / self.jobs, 4) if self.jobs else 0.0
+                for field in FIELDS
+            },
+            "description_length": {
+                "mean": round(self.length_total / self.jobs) if self.jobs else 0,
+                "min": self.length_min or 0,
+                "max": self.length_max,
+                "p50_under": self.percentile(0.5),
+                "p90_under": self.percentile(0.9),
+                "histogram": {
+                    f"<{2**bucket}": count
+                    for bucket, count in sorted(self.length_buckets.items())
+                },
+            },
+            "error_pages": self.failed[PARSE_ERROR],
+            "error_page_rate": round(self.failed[PARSE_ERROR] / outcomes, 4),
+            "failed": dict(self.failed),
+            "failure_rate": round(sum(self.failed.values()) / outcomes, 4),
+        }
+
+
+class QualityTracker:
+    """
+    Data-quality aggregates updated as jobs come out of the pipeline.
+
+    Per site it counts field coverage (title, description, location,
+    posted_at, metadata), the description length distribution, error
+    pages (the parser returned no job) and other failures, in constant
+    memory. Once a site has QUALITY_WINDOW recent outcomes, the window is
+    compared with a baseline: the site's coverage in the previous report
+    if there is one, else its own first full window. A field dropping by
+    DROP_THRESHOLD or more, or error pages rising by as much, is flagged
+    immediately, e.g. after a template change. A previous report is only
+    a baseline for a run of the same mode (full or metadata-only).
+    """
+
+    def __init__(self, previous_report: str | Path | None = None, mode: str = FULL):
+        self.mode = mode
+        self.sites: dict[str, SiteQuality] = {}
+        self.drops: list[dict] = []
+        self._baselines: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+        if previous_report and Path(previous_report).exists():
+            with open(previous_report, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+            if previous.get("mode", FULL) != mode:
+                emit(
+                    f"  Previous quality report {previous_report} is from a "
+                    f"{previous.get('mode', FULL)} run, not used as the baseline",
+                    level="warning",
+                    report=str(previous_report),
+                )
+                return
+            for site, report in previous.get("sites", {}).items():
+                baseline = dict(report["coverage"])
+                baseline[PARSE_ERROR] = report["error_page_rate"]
+                self._baselines[site] = baseline
+
+    def record_job(self, job: Job) -> None:
+        with self._lock:
+            site = self._site(job.source_site)
+            site.add_job(job)
+            self._check(job.source_site, site)
+
+    def record_failure(self, source_site: str, reason: str) -> None:
+        with self._lock:
+            site = self._site(source_site)
+            site.add_failure(reason)
+            self._check(source_site, site)
+
+    def report(self) -> dict:
+        with self._lock:
+            total = SiteQuality()
+            for site in self.sites.values():
+                total.jobs += site.jobs
+                total.present.update(site.present)
+                total.failed.update(site.failed)
+                total.length_total += site.length_total
+                total.length_buckets.update(site.length_buckets)
+                total.length_max = max(total.length_max, site.length_max)
+                if site.length_min is not None and (
+                    total.length_min is None or site.length_min < total.length_min
+                ):
+                    total.length_min = site.length_min
+            return {
+                "generated_at": datetime.now(UTC).isoformat(),
+                "mode": self.mode,
+                "total": total.report(),
+                "sites": {name: site.report() for name, site in self.sites.items()},
+                "drops": list(self.drops),
+            }
+
+    def write(self, path: str | Path) -> dict:
+        report = self.report()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return report
+
+    def _site(self, name: str) -> SiteQuality:
+        if name not in self.sites:
+            self.sites[name] = SiteQuality(self._baselines.get(name))
+        return self.sites[name]
+
+    def _check(self, name: str, site: SiteQuality) -> None:
+        if len(site.recent) < QUALITY_WINDOW:
+            return
+        rates = site.window_rates()
+        if site.baseline is None:
+            site.baseline = rates
+            return
+
+        for field, baseline in site.baseline.items():
+            if field not in rates:
+                continue
+            observed = rates[field]
+            change = (
+                observed - baseline if field == PARSE_ERROR else baseline - observed
+            )
+            if change < DROP_THRESHOLD:
+                site.flagged.discard(field)  # Recovered; flag again on the next drop
+                continue
+            if field in site.flagged:
+                continue
+            site.flagged.add(field)
+            drop = {
+                "site": name,
+                "field": field,
+                "baseline": round(baseline, 4),
+                "observed": round(observed, 4),
+                "after_outcomes": site.outcomes,
+            }
+            self.drops.append(drop)
+            what = "error page rate" if field == PARSE_ERROR else f"{field} coverage"
+            emit(
+                f"  Quality drop on {name}: {what} {observed:.0%} over the last "
+                f"{QUALITY_WINDOW} pages (baseline {baseline:.0%})",
+                level="warning",
+                **drop,
+            )
+
+    def summary(self, report: dict) -> str:
+        total = report["total"]
+        coverage = ", ".join(
+            f"{field} {rate:.0%}" for field, rate in total["coverage"].items()
+        )
+        return (
+            f"Quality: {coverage}; mean description "
+            f"{total['description_length']['mean']} chars; "
+            f"{total['error_pages']} error page(s), "
+            f"{len(report['drops'])} quality drop(s)"
+        )
+
+
+def default_quality_report_path(output_path: str | Path, mode: str = FULL) -> Path:
+    """
+    Quality report next to the output, e.g. jobs.jsonl -> jobs.quality.json.
+
+    Metadata-only runs get their own file (jobs.metadata-quality.json), so
+    they never replace the baseline of full runs.
+    """
+    if mode == METADATA_ONLY:
+        return Path(output_path).with_suffix(".metadata-quality.json")
+    return Path(output_path).with_suffix(".quality.json")
@@ -0,0 +1,91 @@
+import heapq
+import itertools
+import time
+from collections import Counter, deque
+from collections.abc import Collection, Iterable
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+
+@dataclass
+class JobTask:
+    url: str
+    source_site: str
+    attempts: int = 0
+    rate_limited: int = 0
+    last_error: str | None = None
+
+
+class RetryScheduler:
+    """
+    Ready queues per site plus a delay queue of tasks waiting for their retry time.
+
+    Failed tasks are deferred with a due time instead of sleeping in a worker,
+    so the dispatcher keeps feeding workers with other URLs in the meantime.
+    With several sites, the next task comes from the site with the most
+    ready tasks per task already in flight, so workers spread over sites in
+    proportion to the work left and the sites finish at about the same time.
+    """
+
+    def __init__(self, tasks: Iterable[JobTask] = ()):
+        self._ready: dict[str, deque[JobTask]] = {}
+        self._delayed: list[tuple[float, int, JobTask]] = []
+        self._counter = itertools.count()
+        self.in_flight: Counter[str] = Counter()
+        for task in tasks:
+            self.add(task)
+
+    def __len__(self) -> int:
+        return sum(map(len, self._ready.values())) + len(self._delayed)
+
+    def add(self, task: JobTask) -> None:
+        self._ready.setdefault(task.source_site, deque()).append(task)
+
+    def defer(self, task: JobTask, delay: float) -> None:
+        due = time.monotonic() + delay
+        heapq.heappush(self._delayed, (due, next(self._counter), task))
+
+    def pop_ready(
+        self, now: float | None = None, blocked: Collection[str] = ()
+    ) -> JobTask | None:
+        """Return the next task that can run now, skipping blocked sites, or None."""
+        now = time.monotonic() if now is None else now
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, task = heapq.heappop(self._delayed)
+            self.add(task)
+
+        sites = [s for s, queue in self._ready.items() if queue and s not in blocked]
+        if not sites:
+            return None
+        site = max(sites, key=lambda s: len(self._ready[s]) / (self.in_flight[s] + 1))
+        self.in_flight[site] += 1
+        return self._ready[site].popleft()
+
+    def done(self, task: JobTask) -> None:
+        """Mark a task returned by pop_ready as no longer in flight."""
+        self.in_flight[task.source_site] -= 1
+
+    def next_due(self, blocked: Collection[str] = ()) -> float | None:
+        """Monotonic time at which the next task of an unblocked site is ready."""
+        if any(q for s, q in self._ready.items() if s not in blocked):
+            return time.monotonic()
+        if self._delayed:
+            return self._delayed[0][0]
+        return None
+
+    def remove_host(self, host: str) -> list[JobTask]:
+        """Take all queued and delayed tasks for URLs on a host out of the scheduler."""
+        tasks = []
+        for site, queue in self._ready.items():
+            kept = deque()
+            for task in queue:
+                (tasks if urlparse(task.url).netloc == host else kept).append(task)
+            self._ready[site] = kept
+        delayed = [e for e in self._delayed if urlparse(e[2].url).netloc == host]
+        if delayed:
+            tasks.extend(task for _, _, task in sorted(delayed))
+            self._delayed = [
+                e for e in self._delayed if urlparse(e[2].url).netloc != host
+            ]
+            heapq.heapify(self._delayed)
+        return tasks
@@ -1,16 +1,61 @@
+import asyncio
 import json
+import os
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from dataclasses import replace
 from pathlib import Path
 from urllib.parse import urlparse
 
 import requests
+from urllib3.util.request import ACCEPT_ENCODING
 
-from .http import fetch
+from .breaker import (
+    BREAKER_ERROR_RATE,
+    BREAKER_STREAK,
+    CIRCUIT_OPEN,
+    OPEN,
+    CircuitBreaker,
+)
+from .dead_letter import DeadLetterWriter, load_dead_letters, stored_feed_entry
+from .dedup import JobDeduplicator, job_key
+from .feed import FeedEntry, FeedReader
+from .http import (
+    MAX_RATE_LIMIT_RETRIES,
+    RateLimitError,
+    connection_stats,
+    create_session,
+    fetch,
+    get_recovery,
+    transfer_stats,
+)
+from .index import JobIndex
+from .listing import ListingHarvester
+from .memory import RESPONSE_ESTIMATE, ByteBudget, RssSampler, format_bytes
 from .models import Job
-from .parsers import get_parser
+from .parsers import get_parser, get_settled_parser, record_parse_result
+from .planner import PLAN_WORKERS, RunPlan, plan_run
+from .profiler import StageProfiler
+from .progress import ProgressReporter, emit, get_reporter, set_reporter
+from .quality import (
+    FULL,
+    METADATA_ONLY,
+    PARSE_ERROR,
+    QualityTracker,
+    default_quality_report_path,
+)
+from .scheduler import JobTask, RetryScheduler
 from .sitemap_parser import SitemapParser
+from .streaming import read_regions
+from .transform import DescriptionTransformer
+
+RATE_LIMITED = "rate limited"
+ASYNC_BUFFER = 100  # Jobs aiter_jobs buffers before pausing dispatch
+_DONE = object()
 
 
 class AvatureScraper:
@@ -18,144 +63,801 @@ class AvatureScraper:
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
         "Accept-Language": "en-US,en;q=0.9",
+        # gzip/deflate, plus br and zstd when brotli/zstandard are installed
+        "Accept-Encoding": ACCEPT_ENCODING,
     }
 
-    def __init__(self, delay: float = 1.5, max_retries: int = 3, workers: int = 1):
+    def __init__(
+        self,
+        delay: float = 1.5,
+        max_retries: int = 3,
+        workers: int = 1,
+        progress: ProgressReporter | None = None,
+        dedup: bool = True,
+        description_transform: DescriptionTransformer | None = None,
+        metadata_only: bool = False,
+        use_feed: bool = True,
+        memory_budget: int | None = None,
+        stream_parse: bool = False,
+        profiler: StageProfiler | None = None,
+        breaker_error_rate: float = BREAKER_ERROR_RATE,
+        breaker_streak: int = BREAKER_STREAK,
+    ):
         self.delay = delay
         self.max_retries = max_retries
+        # Per-host circuit breaker triggers (see breaker); 0 disables one
+        self.breaker_error_rate = breaker_error_rate
+        self.breaker_streak = breaker_streak
         self.workers = workers
-        self._local = threading.local()
+        self.dedup = dedup
+        self.description_transform = description_transform
+        self.metadata_only = metadata_only
+        self.use_feed = use_feed
+        # Stop downloading job pages once the parser's regions are complete
+        self.stream_parse = stream_parse
+        # Times pipeline stages when profiling (--profile); None: no overhead
+        self.profiler = profiler
+        # Cap on response bytes held by workers at once (None: unbounded)
+        self.memory_budget = ByteBudget(memory_budget) if memory_budget else None
+        self.rss = RssSampler()
+        # Posting dates and locations from job feeds, by site and dedup.job_key;
+        # replaced on each read and dropped once the site's jobs are scraped
+        self._feed_entries: dict[str, dict[str, FeedEntry]] = {}
+        # Messages of every module (emit) go through the scraper's reporter,
+        # so e.g. ProgressReporter(quiet=True) silences a library caller's run
+        if progress:
+            set_reporter(progress)
+        self.progress = progress or get_reporter() or ProgressReporter()
+        # One keep-alive pool per host shared by all workers; the extra slot
+        # covers sitemap/feed requests made next to the job workers
+        self.session = create_session(workers + 1, self.DEFAULT_HEADERS)
+        # Shared too, so redirects resolved while planning are reused later
+        self.sitemap_parser = SitemapParser(self.session)
 
     def _get_session(self) -> requests.Session:
-        """Get thread-local session."""
-        if not hasattr(self._local, "session"):
-            self._local.session = requests.Session()
-            self._local.session.headers.update(self.DEFAULT_HEADERS)
-        return self._local.session
+        """Get the session shared by all workers."""
+        return self.session
 
     def _get_sitemap_parser(self) -> SitemapParser:
-        """Get thread-local sitemap parser."""
-        if not hasattr(self._local, "sitemap_parser"):
-            self._local.sitemap_parser = SitemapParser(self._get_session())
-        return self._local.sitemap_parser
+        """Get the sitemap parser shared by all workers."""
+        return self.sitemap_parser
+
+    def plan(self, urls: list[str], dedup: JobDeduplicator | None = None) -> RunPlan:
+        """Resolve all sites and fetch their sitemaps concurrently (see planner)."""
+        plan = plan_run(self, urls, dedup)
+        for site in plan.sites:
+            if site.error:
+                emit(
+                    f"  {site.url}: {site.error}",
+                    level="warning",
+                    site=site.url,
+                    error=site.error,
+                )
+        emit(
+            plan.summary(),
+            jobs=plan.total_jobs,
+            sites={site.site: site.jobs for site in plan.sites if not site.error},
+            estimated_s=round(plan.estimated_duration()),
+        )
+        return plan
 
     def discover_all(self, urls: list[str]) -> dict[str, int]:
-        """Discover job counts for all sites without scraping."""
-        results = {}
-        total = 0
-
-        for url in urls:
-            url = url.rstrip("/")
-            job_urls = self._get_sitemap_parser().get_job_urls(url)
-            count = len(job_urls)
-            results[url] = count
-            total += count
-            print(f"  {url}: {count} jobs")
-
-        print(f"\nTotal: {total} jobs across {len(urls)} site(s)")
-        return results
-
-    def scrape_all(self, urls: list[str], output_path: str | Path) -> int:
-        """Scrape all sites and write jobs to output file."""
+        """Dry run: plan all sites and report job counts without scraping."""
+        dedup = JobDeduplicator() if self.dedup else None
+        plan = self.plan(urls, dedup)
+        return {site.url: site.jobs for site in plan.sites}
+
+    def scrape_all(
+        self,
+        urls: list[str],
+        output_path: str | Path,
+        dead_letter_path: str | Path | None = None,
+        index_path: str | Path | None = None,
+        quality_report: str | Path | None = None,
+    ) -> int:
+        """
+        Scrape all sites and write jobs to output file (and the index, if set).
+
+        A data-quality report is written next to the output unless
+        quality_report is given; an existing report from a run of the same
+        mode is the baseline that quality drops are measured against.
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        dead_letter_path = dead_letter_path or default_dead_letter_path(output_path)
+        mode = METADATA_ONLY if self.metadata_only else FULL
+        quality_report = quality_report or default_quality_report_path(
+            output_path, mode
+        )
+        quality = QualityTracker(quality_report, mode)
+
+        total_jobs = 0
+        dedup = JobDeduplicator() if self.dedup else None
+
+        with (
+            open(output_path, "w", encoding="utf-8") as f,
+            DeadLetterWriter(dead_letter_path) as dead_letters,
+            JobIndex(index_path) if index_path else nullcontext() as index,
+        ):
+            for job in self.iter_jobs(urls, dead_letters, dedup, quality):
+                with self._stage("serialize"):
+                    _write_job(f, job)
+                total_jobs += 1
+                if index:
+                    with self._stage("index"):
+                        index.upsert(job)
+
+        emit(f"\nTotal jobs scraped: {total_jobs}", jobs=total_jobs)
+        if dedup and (dedup.skipped_urls or dedup.skipped_content):
+            emit(
+                f"Skipped {dedup.skipped_urls} duplicate URL(s) before fetching "
+                f"and {dedup.skipped_content} duplicate job(s) after parsing",
+                duplicate_urls=dedup.skipped_urls,
+                duplicate_jobs=dedup.skipped_content,
+            )
+        if dead_letters.count:
+            emit(
+                f"{dead_letters.count} failed job(s) written to {dead_letter_path}",
+                failed=dead_letters.count,
+            )
+        report = quality.write(quality_report)
+        emit(
+            f"{quality.summary(report)}; report: {quality_report}",
+            quality_drops=len(report["drops"]),
+        )
+        self._emit_transfer_summary(total_jobs)
+        self._emit_connection_summary()
+        self._emit_memory_summary()
+        if self.profiler:
+            emit(
+                self.profiler.summary(),
+                wall_s=round(self.profiler.wall, 3),
+                stages={
+                    name: round(seconds, 3)
+                    for name, (_, seconds, _) in self.profiler.totals().items()
+                },
+            )
+        return total_jobs
+
+    def iter_jobs(
+        self,
+        urls: list[str],
+        dead_letters: DeadLetterWriter | None = None,
+        dedup: JobDeduplicator | None = None,
+        quality: QualityTracker | None = None,
+    ) -> Iterator[Job]:
+        """
+        Scrape sites and yield each Job as it completes, without file output.
+
+        Dispatch happens inside the generator, so a consumer that stops
+        pulling also stops new requests: at most `workers` fetches run ahead.
+        Jobs that run out of retries go to dead_letters if given, and every
+        outcome is counted in quality if given. A deduplicator is created per
+        call unless dedup is disabled or passed in.
+        """
+        if dedup is None and self.dedup:
+            dedup = JobDeduplicator()
+
+        self.progress.start()
+        self.rss.start()
+        if self.profiler:
+            self.profiler.start()
+        try:
+            if self.metadata_only:
+                for url in urls:
+                    emit(f"\nScraping: {url}", site=url)
+                    yield from self._scrape_site_parallel(
+                        url, dead_letters, dedup, quality
+                    )
+            else:
+                yield from self._scrape_planned(urls, dead_letters, dedup, quality)
+        finally:
+            self._feed_entries.clear()
+            if self.profiler:
+                self.profiler.stop()
+            self.rss.stop()
+            self.progress.stop()
+
+    def iter_job_urls(
+        self,
+        base_url: str,
+        job_urls: list[str],
+        dead_letters: DeadLetterWriter | None = None,
+    ) -> Iterator[Job]:
+        """
+        Scrape specific JobDetail URLs of one site, e.g. only the new ones.
+
+        The site's job feed is read first, as in a full scrape, and dropped
+        once the jobs are scraped.
+        """
+        base_url = base_url.rstrip("/")
+        source_site = urlparse(base_url).netloc
+        if self.use_feed and job_urls:
+            self._load_feed(base_url, source_site)
+        try:
+            yield from self._scrape_job_urls(job_urls, source_site, dead_letters)
+        finally:
+            self._feed_entries.pop(source_site, None)
+
+    async def aiter_jobs(
+        self,
+        urls: list[str],
+        dead_letters: DeadLetterWriter | None = None,
+        buffer: int = ASYNC_BUFFER,
+    ) -> AsyncIterator[Job]:
+        """
+        Async variant of iter_jobs.
+
+        Scraping runs in a background thread that hands jobs over through a
+        bounded asyncio.Queue; once `buffer` jobs are waiting, the thread
+        blocks and dispatch pauses until the consumer catches up.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+        stop = threading.Event()
+
+        def produce():
+            jobs = self.iter_jobs(urls, dead_letters)
+            item = _DONE
+            try:
+                for job in jobs:
+                    asyncio.run_coroutine_threadsafe(queue.put(job), loop).result()
+                    if stop.is_set():
+                        return
+            # Any error, whatever its type, is re-raised in the consumer
+            except BaseException as e:  # noqa: BLE001
+                item = e
+            finally:
+                jobs.close()
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        producer = loop.run_in_executor(None, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Unblock a pending put so the producer sees the stop flag
+            stop.set()
+            while not queue.empty():
+                queue.get_nowait()
+            await producer
+
+    def retry_failed(
+        self,
+        dead_letter_path: str | Path,
+        output_path: str | Path,
+        index_path: str | Path | None = None,
+    ) -> int:
+        """Re-process only the URLs in a dead-letter file, appending to output."""
+        dead_letter_path = Path(dead_letter_path)
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
+        by_site = load_dead_letters(dead_letter_path)
+        tmp_path = dead_letter_path.with_name(dead_letter_path.name + ".tmp")
+
         total_jobs = 0
-        lock = threading.Lock()
+        recovered: set[str] = set()
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            for url in urls:
-                print(f"\nScraping: {url}")
-                for job in self._scrape_site_parallel(url, f, lock):
-                    total_jobs += 1
+        self.progress.start()
+        try:
+            with (
+                open(output_path, "a", encoding="utf-8") as f,
+                DeadLetterWriter(tmp_path) as dead_letters,
+                JobIndex(index_path) if index_path else nullcontext() as index,
+            ):
+                try:
+                    for source_site, records in by_site.items():
+                        emit(
+                            f"\nRetrying {len(records)} failed job(s) on {source_site}",
+                            site=source_site,
+                            jobs=len(records),
+                        )
+                        # Enrich retried jobs like the first pass did
+                        self._feed_entries[source_site] = {
+                            job_key(url): entry
+                            for url, record in records.items()
+                            if (entry := stored_feed_entry(record))
+                        }
+                        for job in self._scrape_job_urls(
+                            list(records), source_site, dead_letters
+                        ):
+                            _write_job(f, job)
+                            recovered.add(job.apply_url)
+                            total_jobs += 1
+                            if index:
+                                index.upsert(job)
+                        self._feed_entries.pop(source_site, None)
+                finally:
+                    # Keep URLs an interrupted retry never got to
+                    for records in by_site.values():
+                        for url, record in records.items():
+                            if url not in recovered and url not in dead_letters.urls:
+                                dead_letters.write_record(record)
+        finally:
+            self.progress.stop()
+            self._feed_entries.clear()
+            if tmp_path.exists():
+                os.replace(tmp_path, dead_letter_path)
 
-        print(f"\nTotal jobs scraped: {total_jobs}")
+        emit(f"\nRecovered {total_jobs} job(s)", jobs=total_jobs)
+        if dead_letters.count:
+            emit(
+                f"{dead_letters.count} job(s) still failing in {dead_letter_path}",
+                failed=dead_letters.count,
+            )
         return total_jobs
 
-    def _scrape_site_parallel(self, base_url: str, file, lock: threading.Lock):
+    def _scrape_site_parallel(
+        self,
+        base_url: str,
+        dead_letters: DeadLetterWriter | None = None,
+        dedup: JobDeduplicator | None = None,
+        quality: QualityTracker | None = None,
+    ) -> Iterator[Job]:
         """Scrape all jobs from a site using parallel workers."""
         base_url = base_url.rstrip("/")
         source_site = urlparse(base_url).netloc
 
-        job_urls = self._get_sitemap_parser().get_job_urls(base_url)
-        total = len(job_urls)
-        print(f"  Found {total} jobs in sitemap")
-
-        failed = 0
-        if self.workers == 1:
-            for i, job_url in enumerate(job_urls, 1):
-                job, error = self._fetch_job_details(job_url, source_site)
-                if job:
-                    self._log_job(i, total, job.title)
-                    with lock:
-                        file.write(json.dumps(job.to_dict(), ensure_ascii=False) + "\n")
-                        file.flush()
-                    yield job
-                else:
-                    self._log_job(i, total, None, error)
-                    failed += 1
-                time.sleep(self.delay)
+        if self.metadata_only:
+            self.rss.set_stage("listing")
+            harvested = yield from self._harvest_listing(
+                base_url, source_site, dedup, quality
+            )
+            if harvested:
+                return
+            emit(
+                f"  No jobs from SearchJobs listing on {source_site}, "
+                "falling back to detail pages",
+                level="warning",
+                site=source_site,
+            )
+
+        self.rss.set_stage("sitemap")
+        groups = self._get_sitemap_parser().get_job_groups(base_url)
+        if dedup:
+            job_urls = dedup.filter_groups(groups)
         else:
-            completed = 0
-            with ThreadPoolExecutor(max_workers=self.workers) as executor:
-                futures = {
-                    executor.submit(self._fetch_job_details, url, source_site): url
-                    for url in job_urls
+            job_urls = [group[0] for group in groups]
+
+        duplicates = len(groups) - len(job_urls)
+        message = f"  Found {len(groups)} jobs in sitemap"
+        if duplicates:
+            message += f" ({duplicates} already seen on another portal or locale)"
+        emit(message, site=source_site, jobs=len(job_urls), duplicates=duplicates)
+        if self.use_feed and job_urls:
+            self.rss.set_stage("feed")
+            self._load_feed(base_url, source_site)
+        self.rss.set_stage("jobs")
+        yield from self._scrape_job_urls(
+            job_urls, source_site, dead_letters, dedup, quality
+        )
+
+    def _scrape_planned(
+        self,
+        urls: list[str],
+        dead_letters: DeadLetterWriter | None = None,
+        dedup: JobDeduplicator | None = None,
+        quality: QualityTracker | None = None,
+    ) -> Iterator[Job]:
+        """Plan all sites up front, then fetch every job through one scheduler."""
+        self.rss.set_stage("sitemap")
+        emit(f"\nPlanning {len(urls)} site(s)...", sites=len(urls))
+        with self._stage("plan"):
+            plan = self.plan(urls, dedup)
+        sites = [site for site in plan.sites if site.jobs]
+
+        if self.use_feed and sites:
+            self.rss.set_stage("feed")
+            with (
+                self._stage("feed"),
+                ThreadPoolExecutor(max_workers=PLAN_WORKERS) as executor,
+            ):
+                list(
+                    executor.map(
+                        lambda site: self._load_feed(site.url, site.site), sites
+                    )
+                )
+
+        self.rss.set_stage("jobs")
+        tasks = [JobTask(url, site.site) for site in sites for url in site.job_urls]
+        for source_site, count in Counter(task.source_site for task in tasks).items():
+            self.progress.start_host(source_site, count)
+        yield from self._scrape_tasks(tasks, dead_letters, dedup, quality)
+
+    def _load_feed(self, base_url: str, source_site: str) -> None:
+        """Read the site's job feed into _feed_entries (one request per site)."""
+        try:
+            final_url = self._get_sitemap_parser().resolve(base_url)
+            entries = FeedReader(self._get_session()).read(final_url)
+        except (requests.RequestException, RuntimeError) as e:
+            emit(f"  No job feed ({e})", level="warning", site=source_site)
+            return
+
+        self._feed_entries[source_site] = entries
+        dated = sum(1 for entry in entries.values() if entry.posted_at)
+        emit(
+            f"  Feed: {len(entries)} jobs, {dated} with posting dates",
+            site=source_site,
+            feed_jobs=len(entries),
+            dated=dated,
+        )
+
+    def _harvest_listing(
+        self,
+        base_url: str,
+        source_site: str,
+        dedup: JobDeduplicator | None = None,
+        quality: QualityTracker | None = None,
+    ):
+        """
+        Partial jobs (no description) from the SearchJobs listing.
+
+        Yields new jobs and returns how many the listing had,
+        duplicates included. Only the job key is used for dedup, as partial
+        jobs share empty descriptions.
+        """
+        harvester = ListingHarvester(self._get_session(), delay=self.delay)
+        found = count = 0
+        try:
+            final_url = self._get_sitemap_parser().resolve(base_url)
+            for job in harvester.harvest(final_url, source_site):
+                found += 1
+                if dedup and not dedup.filter_groups([[job.apply_url]]):
+                    continue
+                count += 1
+                if quality:
+                    quality.record_job(job)
+                yield job
+        except (requests.RequestException, RuntimeError) as e:
+            emit(f"  Listing error: {e}", level="warning", site=source_site)
+
+        if found:
+            emit(
+                f"  Harvested {found} jobs from {harvester.pages} listing page(s)"
+                + (f" ({found - count} already seen)" if found > count else ""),
+                site=source_site,
+                jobs=count,
+                duplicates=found - count,
+                pages=harvester.pages,
+            )
+        return found
+
+    def _scrape_job_urls(
+        self,
+        job_urls: list[str],
+        source_site: str,
+        dead_letters: DeadLetterWriter | None = None,
+        dedup: JobDeduplicator | None = None,
+        quality: QualityTracker | None = None,
+    ) -> Iterator[Job]:
+        """Fetch the job URLs of one site (see _scrape_tasks)."""
+        self.progress.start_host(source_site, len(job_urls))
+        tasks = [JobTask(url, source_site) for url in job_urls]
+        yield from self._scrape_tasks(tasks, dead_letters, dedup, quality)
+
+    def _scrape_tasks(
+        self,
+        tasks: list[JobTask],
+        dead_letters: DeadLetterWriter | None = None,
+        dedup: JobDeduplicator | None = None,
+        quality: QualityTracker | None = None,
+    ) -> Iterator[Job]:
+        """
+        Fetch job tasks, possibly of many sites, through a retry scheduler.
+
+        Each worker makes a single attempt. Failed URLs go back into a delay
+        queue with their backoff as due time while workers keep serving other
+        URLs; URLs that run out of retries are written to the dead-letter file.
+        Workers are shared by all sites; a site whose host is recovering from
+        a rate limit, or whose circuit breaker is open, gets no new requests
+        while the others carry on. URLs of a host the breaker gave up on are
+        written to the dead-letter file as "circuit open" without fetching.
+        """
+        scheduler = RetryScheduler(tasks)
+        site_hosts: dict[str, set[str]] = {}
+        for task in tasks:
+            site_hosts.setdefault(task.source_site, set()).add(
+                urlparse(task.url).netloc
+            )
+        recoveries = {
+            site: [get_recovery(host) for host in hosts]
+            for site, hosts in site_hosts.items()
+        }
+        breakers = {
+            host: CircuitBreaker(host, self.breaker_error_rate, self.breaker_streak)
+            for hosts in site_hosts.values()
+            for host in hosts
+        }
+        in_flight = {}
+        probes = set()  # Futures of half-open breaker probes
+        not_before = 0.0
+        failed: Counter[str] = Counter()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while scheduler or in_flight:
+                now = time.monotonic()
+                # Sites whose hosts are recovering from a rate limit or have an
+                # open circuit breaker get no new requests
+                waits = {
+                    site: max(
+                        [r.wait_time() for r in site_recoveries]
+                        + [breakers[host].wait_time(now) for host in site_hosts[site]]
+                    )
+                    for site, site_recoveries in recoveries.items()
                 }
+                blocked = {site for site, wait in waits.items() if wait > 0}
+                while len(in_flight) < self.workers and now >= not_before:
+                    task = scheduler.pop_ready(now, blocked)
+                    if task is None:
+                        break
+                    retry = task.last_error is not None
+                    self.progress.job_started(task.source_site, retry=retry)
+                    future = executor.submit(self._fetch_job_details, task)
+                    in_flight[future] = task
+                    if breakers[urlparse(task.url).netloc].dispatched(now):
+                        probes.add(future)
+                        blocked.add(task.source_site)  # One probe at a time
+
+                timeout = None
+                if len(in_flight) < self.workers and scheduler:
+                    wake_at = scheduler.next_due(blocked)
+                    if blocked:
+                        unblock_at = now + min(waits[site] for site in blocked)
+                        wake_at = min(wake_at or unblock_at, unblock_at)
+                    if wake_at is not None:
+                        timeout = max(0.0, max(wake_at, not_before) - now)
+
+                if not in_flight:
+                    if timeout:
+                        # Nothing to do until a delay, cooldown or backoff ends
+                        if now < not_before:
+                            reason = "delay"
+                        elif any(b.state == OPEN for b in breakers.values()):
+                            reason = "circuit open"
+                        elif blocked:
+                            reason = "rate-limit wait"
+                        else:
+                            reason = "backoff"
+                        with self._stage(reason):
+                            time.sleep(timeout)
+                    continue
+
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = in_flight.pop(future)
+                    scheduler.done(task)
+                    job, error, retry_in = future.result()
+                    if self.workers == 1:
+                        not_before = time.monotonic() + self.delay
+                    breaker = breakers[urlparse(task.url).netloc]
+                    breaker.record(error, probe=future in probes)
+                    probes.discard(future)
 
-                for future in as_completed(futures):
-                    completed += 1
-                    job, error = future.result()
                     if job:
-                        self._log_job(completed, total, job.title)
-                        with lock:
-                            file.write(
-                                json.dumps(job.to_dict(), ensure_ascii=False) + "\n"
-                            )
-                            file.flush()
+                        self.progress.job_finished(task.source_site, ok=True)
+                        if dedup and dedup.is_duplicate(job):
+                            continue
+                        if quality:
+                            quality.record_job(job)
                         yield job
+                    elif (
+                        retry_in is not None
+                        and not breaker.given_up
+                        and self._can_retry(task, error)
+                    ):
+                        self.progress.job_deferred(task.source_site)
+                        scheduler.defer(task, retry_in)
                     else:
-                        self._log_job(completed, total, None, error)
-                        failed += 1
+                        self.progress.job_finished(task.source_site, ok=False)
+                        if dead_letters:
+                            dead_letters.write(
+                                task.url,
+                                task.source_site,
+                                error,
+                                task.attempts,
+                                self._feed_entry(task),
+                            )
+                        emit(
+                            f"  x {task.url}: {error}",
+                            site=task.source_site,
+                            url=task.url,
+                            error=error,
+                        )
+                        failed[task.source_site] += 1
+                        if quality:
+                            quality.record_failure(task.source_site, error)
 
-        if failed > 0:
-            print(f"  Skipped {failed} failed requests")
+                    if breaker.given_up:
+                        # Only this host's URLs; the site's other hosts carry on
+                        skipped = scheduler.remove_host(breaker.host)
+                        for skipped_task in skipped:
+                            site = skipped_task.source_site
+                            self.progress.job_skipped(
+                                site, retry=skipped_task.last_error is not None
+                            )
+                            if dead_letters:
+                                dead_letters.write(
+                                    skipped_task.url,
+                                    site,
+                                    CIRCUIT_OPEN,
+                                    skipped_task.attempts,
+                                    self._feed_entry(skipped_task),
+                                )
+                            if quality:
+                                quality.record_failure(site, CIRCUIT_OPEN)
+                            failed[site] += 1
+                        if skipped:
+                            emit(
+                                f"  x {len(skipped)} remaining URL(s) on "
+                                f"{breaker.host}: {CIRCUIT_OPEN}",
+                                site=task.source_site,
+                                host=breaker.host,
+                                error=CIRCUIT_OPEN,
+                                failed=len(skipped),
+                            )
 
-    def _log_job(self, i: int, total: int, title: str | None, error: str | None = None):
-        """Log job fetch result in compact format."""
-        idx = f"[{i}/{total}]"
-        if title:
-            print(f"  {idx} {title[:60]}")
-        else:
-            print(f"  {idx} x {error}")
+        for site, count in failed.items():
+            emit(
+                f"  Skipped {count} failed requests on {site}", site=site, failed=count
+            )
+
+    def _feed_entry(self, task: JobTask) -> FeedEntry | None:
+        return self._feed_entries.get(task.source_site, {}).get(job_key(task.url))
+
+    def _can_retry(self, task: JobTask, error: str) -> bool:
+        """Decide whether a failed task goes back into the scheduler."""
+        task.last_error = error
+        if error == RATE_LIMITED:
+            return task.rate_limited <= MAX_RATE_LIMIT_RETRIES
+        return task.attempts < self.max_retries
 
     def _fetch_job_details(
-        self, url: str, source_site: str
-    ) -> tuple[Job | None, str | None]:
-        """Fetch and parse a job detail page. Returns (job, error)."""
-        session = self._get_session()
+        self, task: JobTask
+    ) -> tuple[Job | None, str | None, float | None]:
+        """
+        Fetch and parse a job detail page once.
 
-        for attempt in range(self.max_retries):
-            try:
-                response = fetch(session, url, follow_redirects=False)
-                parser = get_parser(source_site)
-                job = parser.parse(response.text, url, None, source_site)
-                return (job, None) if job else (None, "parse error")
-            except requests.exceptions.HTTPError as e:
-                if attempt < self.max_retries - 1:
-                    time.sleep(2**attempt)
-                else:
-                    return None, str(e.response.status_code)
-            except requests.exceptions.Timeout:
-                if attempt < self.max_retries - 1:
-                    time.sleep(2**attempt)
-                else:
-                    return None, "timeout"
-            except requests.RequestException:
-                if attempt < self.max_retries - 1:
-                    time.sleep(2**attempt)
-                else:
-                    return None, "connection error"
-            except RuntimeError as e:
-                return None, str(e)
-        return None, "max retries"
+        Returns (job, error, retry_in): retry_in is the backoff in seconds
+        for retryable failures and None for permanent ones.
+        """
+        backoff = 2**task.attempts
+        task.attempts += 1
+
+        reserved = 0
+        try:
+            with self._stage("fetch"):
+                html, reserved = self._download(task)
+
+            feed_entry = self._feed_entry(task)
+            posted_at = feed_entry.posted_at if feed_entry else None
+            parser = get_parser(task.source_site, html)
+            with self._stage(f"parse:{type(parser).__name__}"):
+                job = parser.parse(html, task.url, posted_at, task.source_site)
+            del html
+            record_parse_result(
+                task.source_site, bool(job and job.title and job.description)
+            )
+            if not job:
+                return None, PARSE_ERROR, None
+            if feed_entry and feed_entry.location and not job.location:
+                job = replace(job, location=feed_entry.location)
+            if self.description_transform:
+                with self._stage("transform"):
+                    job = self.description_transform.transform(job)
+            return job, None, None
+        except RateLimitError as e:
+            task.attempts -= 1  # Cooldowns do not use up regular retries
+            if e.rejected:
+                task.rate_limited += 1
+            return None, RATE_LIMITED, e.retry_in
+        except requests.exceptions.HTTPError as e:
+            return None, str(e.response.status_code), backoff
+        except requests.exceptions.Timeout:
+            return None, "timeout", backoff
+        except requests.RequestException:
+            return None, "connection error", backoff
+        except RuntimeError as e:
+            return None, str(e), None
+        finally:
+            if reserved:
+                self.memory_budget.release(reserved)
+
+    def _download(self, task: JobTask) -> tuple[str, int]:
+        """Fetch a job page; returns its HTML and the memory budget reserved."""
+        # Pages are only cut short once the domain's template is known
+        settled = get_settled_parser(task.source_site) if self.stream_parse else None
+        regions = settled.STREAM_REGIONS if settled else ()
+
+        response = fetch(
+            self._get_session(),
+            task.url,
+            follow_redirects=False,
+            wait_on_rate_limit=False,
+            stream=self.memory_budget is not None or bool(regions),
+        )
+        if self.memory_budget:
+            return self._read_within_budget(response, regions)
+        if regions:
+            return read_regions(response, regions)[0], 0
+        return response.text, 0
+
+    def _stage(self, name: str):
+        """Time a pipeline stage when profiling."""
+        return self.profiler.stage(name) if self.profiler else nullcontext()
+
+    def _read_within_budget(
+        self, response: requests.Response, regions: tuple[str, ...] = ()
+    ) -> tuple[str, int]:
+        """
+        Reserve budget for a streamed body, then read it (up to regions, if any).
+
+        Returns the page and the bytes reserved, to be released once the page
+        is parsed. Bodies larger than announced (compressed or without
+        Content-Length) are accounted for after reading.
+        """
+        expected = int(response.headers.get("Content-Length") or RESPONSE_ESTIMATE)
+        self.memory_budget.acquire(expected)
+        try:
+            if regions:
+                html, size = read_regions(response, regions)
+            else:
+                size = len(response.content)
+                transfer_stats.record(response, size)
+                html = response.text
+        except BaseException:
+            self.memory_budget.release(expected)
+            raise
+        if size > expected:
+            self.memory_budget.add(size - expected)
+            return html, size
+        return html, expected
+
+    def _emit_transfer_summary(self, jobs: int) -> None:
+        kinds = transfer_stats.by("kind")
+        wire = sum(totals[1] for totals in kinds.values())
+        emit(
+            transfer_stats.summary(jobs),
+            bytes_received=wire,
+            bytes_decompressed=sum(totals[2] for totals in kinds.values()),
+            bytes_per_job=round(wire / jobs) if jobs else None,
+            bytes_by_kind={kind: totals[1] for kind, totals in kinds.items()},
+        )
+
+    def _emit_connection_summary(self) -> None:
+        per_host = connection_stats.per_host().values()
+        emit(
+            connection_stats.summary(),
+            requests=connection_stats.requests,
+            connections=sum(opened for opened, _ in per_host),
+            connect_s=round(sum(seconds for _, seconds in per_host), 3),
+        )
+
+    def _emit_memory_summary(self) -> None:
+        if self.rss.peaks:
+            emit(
+                self.rss.summary(),
+                **{f"peak_rss_{stage}": rss for stage, rss in self.rss.peaks.items()},
+            )
+        if self.memory_budget:
+            emit(
+                f"Response bytes in flight peaked at "
+                f"{format_bytes(self.memory_budget.peak)} of "
+                f"{format_bytes(self.memory_budget.limit)}",
+                peak_response_bytes=self.memory_budget.peak,
+            )
+
+
+def _write_job(file, job: Job) -> None:
+    file.write(json.dumps(job.to_dict(), ensure_ascii=False) + "\n")
+    file.flush()
+
+
+def default_dead_letter_path(output_path: str | Path) -> Path:
+    """Dead-letter file next to the output, e.g. jobs.jsonl -> jobs.failed.jsonl."""
+    return Path(output_path).with_suffix(".failed.jsonl")
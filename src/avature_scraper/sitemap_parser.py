@@ -1,49 +1,190 @@
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+
+from .http import fetch, transfer_stats
+from .progress import emit
+
+PROBE_CHUNK_SIZE = 16 * 1024
 
 
 class SitemapParser:
     def __init__(self, session: requests.Session):
         self.session = session
+        self._resolved: dict[str, str] = {}
 
     def get_job_urls(self, base_url: str) -> list[str]:
         """Fetch all job URLs from sitemap.xml in a single request."""
+        return [group[0] for group in self.get_job_groups(base_url)]
+
+    def get_job_groups(self, base_url: str) -> list[list[str]]:
+        """
+        Fetch job URLs with their hreflang alternates from sitemap.xml.
+
+        Each group starts with the x-default URL, followed by the other
+        locale URLs the sitemap lists for the same job.
+        """
         final_url = self._follow_redirects(base_url)
         if not final_url:
             return []
 
-        sitemap_url = f"{final_url}/sitemap.xml"
-
         try:
-            response = self.session.get(sitemap_url, timeout=30)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            print(f"  Sitemap fetch error: {e}")
+            return self.fetch_groups(final_url)
+        except (requests.RequestException, RuntimeError) as e:
+            emit(f"  Sitemap fetch error: {e}", level="warning")
             return []
 
-        return self._parse_sitemap(response.text)
+    def resolve(self, url: str) -> str:
+        """
+        Follow redirects and return the final URL without trailing slash.
+
+        Results are remembered, so the sitemap, feed and listing lookups
+        for a site share one landing page request.
+        """
+        if url not in self._resolved:
+            response = fetch(self.session, url)
+            self._resolved[url] = response.url.rstrip("/")
+        return self._resolved[url]
+
+    def forget(self, url: str) -> None:
+        """Drop a memoized redirect target, so the next resolve follows it anew."""
+        self._resolved.pop(url, None)
+
+    def fetch_groups(self, final_url: str) -> list[list[str]]:
+        """
+        Stream {final_url}/sitemap.xml into job URL groups, raising on HTTP errors.
+
+        Chunks go through a pull parser and each <url> entry is freed once
+        its groups are read, so memory stays flat however large the
+        sitemap is.
+        """
+        response = fetch(self.session, f"{final_url}/sitemap.xml", stream=True)
+        parser = _pull_parser()
+        groups: list[list[str]] = []
+        seen: set[str] = set()
+        received = 0
+
+        try:
+            for chunk in response.iter_content(PROBE_CHUNK_SIZE):
+                received += len(chunk)
+                parser.feed(chunk)
+                self._collect_groups(parser, groups, seen)
+        finally:
+            transfer_stats.record(response, received)
+            response.close()
+
+        return groups
+
+    def probe(self, final_url: str, count: bool = False) -> int:
+        """
+        Stream {final_url}/sitemap.xml looking for JobDetail links.
+
+        Returns 1 at the first valid job link and stops the download there.
+        With count=True the whole sitemap is streamed and the number of
+        distinct job URLs is returned, without building a DOM.
+        """
+        response = fetch(self.session, f"{final_url}/sitemap.xml", stream=True)
+        parser = _pull_parser(("start", "end"))
+        job_urls = set()
+        received = 0
+
+        try:
+            for chunk in response.iter_content(PROBE_CHUNK_SIZE):
+                received += len(chunk)
+                parser.feed(chunk)
+                for event, element in parser.read_events():
+                    tag = _local_name(element.tag)
+                    if event == "end":
+                        if tag == "url":
+                            _discard(element)
+                        continue
+                    if tag != "link" or element.get("hreflang") != "x-default":
+                        continue
+                    href = element.get("href")
+                    if self._is_job_url(href):
+                        if not count:
+                            return 1
+                        job_urls.add(href)
+        finally:
+            transfer_stats.record(response, received)
+            response.close()
+
+        return len(job_urls)
 
     def _follow_redirects(self, url: str) -> str | None:
         """Follow redirects and return the final URL without trailing slash."""
         try:
-            response = self.session.get(url, timeout=30, allow_redirects=True)
-            response.raise_for_status()
-            final_url = response.url.rstrip("/")
-            return final_url
-        except requests.RequestException as e:
-            print(f"  URL validation error for {url}: {e}")
+            return self.resolve(url)
+        except (requests.RequestException, RuntimeError) as e:
+            emit(f"  URL validation error for {url}: {e}", level="warning")
             return None
 
     def _parse_sitemap(self, html: str) -> list[str]:
         """Parse sitemap and extract JobDetail URLs."""
-        soup = BeautifulSoup(html, "lxml-xml")
+        return [group[0] for group in self._parse_sitemap_groups(html)]
+
+    def _parse_sitemap_groups(self, html: str) -> list[list[str]]:
+        """Parse sitemap into groups of alternate JobDetail URLs."""
+        parser = _pull_parser()
+        groups: list[list[str]] = []
+        parser.feed(html.encode("utf-8"))
+        self._collect_groups(parser, groups, set())
+        return groups
+
+    def _collect_groups(
+        self, parser: etree.XMLPullParser, groups: list[list[str]], seen: set[str]
+    ) -> None:
+        """
+        Add a group per x-default job link of each completed <url> entry.
+
+        A group starts with the x-default URL, followed by the entry's other
+        hreflang links in document order.
+        """
+        for _, element in parser.read_events():
+            if _local_name(element.tag) != "url":
+                continue
+            links = [
+                child
+                for child in element
+                if _local_name(child.tag) == "link"
+                and child.get("hreflang") is not None
+            ]
+            for link in links:
+                href = link.get("href")
+                if link.get("hreflang") != "x-default":
+                    continue
+                if not self._is_job_url(href) or href in seen:
+                    continue
+                seen.add(href)
+
+                group = [href]
+                for alternate in links:
+                    alt_href = alternate.get("href")
+                    if alt_href not in group and self._is_job_url(alt_href):
+                        group.append(alt_href)
+                groups.append(group)
+            _discard(element)
+
+    @staticmethod
+    def _is_job_url(href: str | None) -> bool:
+        if not href or "/JobDetail/" not in href:
+            return False
+        path_parts = href.split("/JobDetail/")
+        return len(path_parts) > 1 and bool(path_parts[1])
+
+
+def _pull_parser(events: tuple[str, ...] = ("end",)) -> etree.XMLPullParser:
+    return etree.XMLPullParser(events=events, recover=True, huge_tree=True)
+
+
+def _local_name(tag) -> str | None:
+    if not isinstance(tag, str):
+        return None
+    return tag.rsplit("}", 1)[-1]
 
-        urls = []
-        for link in soup.find_all("link", attrs={"hreflang": "x-default"}):
-            href = link.get("href")
-            if href and "/JobDetail/" in href:
-                path_parts = href.split("/JobDetail/")
-                if len(path_parts) > 1 and path_parts[1]:
-                    urls.append(href)
 
-        return list(set(urls))
+def _discard(element) -> None:
+    """Free a finished <url> entry and the ones before it."""
+    element.clear()
+    parent = element.getparent()
+    while element.getprevious() is not None:
+        del parent[0]
@@ -0,0 +1,66 @@
+import requests
+from lxml import etree
+
+from .http import transfer_stats
+
+STREAM_CHUNK_SIZE = 8 * 1024
+# Once the regions are complete, a remainder up to this size is still read
+# so the connection can go back to the pool; larger ones close it instead
+DRAIN_LIMIT = 16 * 1024
+
+
+def read_regions(
+    response: requests.Response,
+    regions: tuple[str, ...],
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> tuple[str, int]:
+    """
+    Read a streamed HTML response only as far as a parser needs it.
+
+    Chunks are fed to an lxml HTMLPullParser as they arrive. A region is
+    the first element whose class list contains the name; once the end tag
+    of every region has been seen, the rest of the body (footers, scripts,
+    related-jobs widgets) is skipped. Pages where a region never shows up
+    are read in full.
+
+    Returns the HTML read so far, decoded, and the bytes received. The
+    response is always closed.
+    """
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    pending = set(regions)
+    started: dict = {}  # element -> region names it opened
+    chunks = []
+    received = 0
+
+    try:
+        body = response.iter_content(chunk_size)
+        for chunk in body:
+            chunks.append(chunk)
+            received += len(chunk)
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                if event == "start":
+                    names = pending.intersection((element.get("class") or "").split())
+                    names.difference_update(*started.values())
+                    if names:
+                        started[element] = names
+                elif element in started:
+                    pending.difference_update(started.pop(element))
+            if not pending:
+                received += _drain(response, body, received)
+                break
+    finally:
+        transfer_stats.record(response, received)
+        response.close()
+
+    return b"".join(chunks).decode(response.encoding or "utf-8", "replace"), received
+
+
+def _drain(response: requests.Response, body, received: int) -> int:
+    """Read a small remainder so the connection is reused; returns its size."""
+    length = response.headers.get("Content-Length")
+    if response.headers.get("Content-Encoding") or not length:
+        return 0  # Remaining decoded size unknown
+    if int(length) - received > DRAIN_LIMIT:
+        return 0
+    return sum(len(chunk) for chunk in body)
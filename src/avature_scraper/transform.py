@@ -0,0 +1,204 @@
+import html
+import re
+from dataclasses import dataclass, field, replace
+
+from lxml import etree
+
+from .models import Job
+
+WHITESPACE = re.compile(r"[\s\xa0]+")
+
+VOID_TAGS = frozenset({"br", "hr", "img", "wbr"})
+# Kept even when empty: dropping a blank cell would shift the columns after it
+KEEP_EMPTY_TAGS = VOID_TAGS | {"td", "th"}
+SKIP_TAGS = frozenset({"script", "style", "noscript", "template"})
+WRAPPER_TAGS = frozenset({"html", "body", "head"})
+HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+BLOCK_TAGS = frozenset(
+    {"p", "div", "section", "article", "header", "footer", "blockquote"}
+    | {"ul", "ol", "li", "table", "tr"}
+    | HEADINGS.keys()
+)
+MARKDOWN_INLINE = {"strong": "**", "b": "**", "em": "*", "i": "*"}
+
+DESCRIPTION_FORMATS = ("text", "markdown")
+
+
+@dataclass
+class _Frame:
+    tag: str
+    attrs: str = ""
+    html: list[str] = field(default_factory=list)
+    text: list[str] = field(default_factory=list)
+    markdown: list[str] = field(default_factory=list)
+    has_content: bool = False
+    items: int = 0  # <li> children so far, to number <ol> items
+
+
+class _StreamTarget:
+    """
+    lxml parser target that rebuilds the description in a single pass.
+
+    Elements are buffered on a stack only until their end tag, so empty
+    nodes can be dropped and attributes stripped without building a tree.
+    HTML, plain text and Markdown output are produced together.
+    """
+
+    def __init__(self, transformer: "DescriptionTransformer"):
+        self.t = transformer
+        self.stack = [_Frame("root")]
+        self.skip_depth = 0
+
+    def start(self, tag, attrib):
+        if self.skip_depth or tag in SKIP_TAGS:
+            self.skip_depth += 1
+            return
+        if tag in WRAPPER_TAGS:
+            return
+        self.stack.append(_Frame(tag, self.t._format_attrs(tag, attrib)))
+
+    def end(self, tag):
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return
+        if tag in WRAPPER_TAGS or len(self.stack) == 1:
+            return
+
+        frame = self.stack.pop()
+        parent = self.stack[-1]
+        void = tag in VOID_TAGS
+
+        if not frame.has_content and tag not in KEEP_EMPTY_TAGS and self.t.drop_empty:
+            return
+
+        parent.has_content = True
+        inner_html = "".join(frame.html)
+        inner_text = "".join(frame.text)
+        inner_md = "".join(frame.markdown)
+
+        if tag in self.t.unwrap_tags:
+            parent.html.append(inner_html)
+        elif void:
+            parent.html.append(f"<{tag}{frame.attrs}>")
+        else:
+            parent.html.append(f"<{tag}{frame.attrs}>{inner_html}</{tag}>")
+
+        if tag == "br":
+            parent.text.append("\n")
+            parent.markdown.append("  \n")
+        elif tag in BLOCK_TAGS:
+            parent.text.append(f"\n{inner_text.strip()}\n")
+            parent.markdown.append(self._markdown_block(tag, inner_md.strip(), parent))
+        else:
+            parent.text.append(inner_text)
+            parent.markdown.append(self._markdown_inline(tag, frame, inner_md))
+
+    def data(self, data):
+        if self.skip_depth or len(self.stack) == 1 and not data.strip():
+            return
+        if self.t.collapse_whitespace:
+            data = WHITESPACE.sub(" ", data)
+        frame = self.stack[-1]
+        if data.strip():
+            frame.has_content = True
+        frame.html.append(html.escape(data, quote=False))
+        frame.text.append(data)
+        frame.markdown.append(data)
+
+    def close(self):
+        return self.stack[0]
+
+    def _markdown_block(self, tag: str, content: str, parent: _Frame) -> str:
+        if not content:
+            return ""
+        if tag in HEADINGS:
+            return f"\n\n{'#' * HEADINGS[tag]} {content}\n\n"
+        if tag == "li":
+            if parent.tag == "ol":
+                parent.items += 1
+                return f"\n{parent.items}. {content}"
+            return f"\n- {content}"
+        if tag in ("ul", "ol"):
+            return f"\n{content}\n\n"
+        return f"\n\n{content}\n\n"
+
+    def _markdown_inline(self, tag: str, frame: _Frame, content: str) -> str:
+        if not content.strip():
+            return content
+        if tag in MARKDOWN_INLINE:
+            mark = MARKDOWN_INLINE[tag]
+            return f"{mark}{content.strip()}{mark}"
+        if tag == "a":
+            href = re.search(r'href="([^"]*)"', frame.attrs)
+            if href:
+                return f"[{content.strip()}]({html.unescape(href.group(1))})"
+        return content
+
+
+@dataclass
+class DescriptionTransformer:
+    """
+    Post-parse cleanup of description HTML, run in the parse workers.
+
+    Strips attributes (except those in keep_attributes), drops empty nodes,
+    unwraps purely presentational tags and collapses whitespace in a single
+    streaming pass. Plain text and Markdown versions can be emitted next to
+    the HTML via `formats`; with minify_html=False the original HTML is kept.
+    """
+
+    minify_html: bool = True
+    strip_attributes: bool = True
+    drop_empty: bool = True
+    collapse_whitespace: bool = True
+    unwrap_tags: frozenset[str] = frozenset({"span", "font"})
+    keep_attributes: dict[str, frozenset[str]] = field(
+        default_factory=lambda: {
+            "a": frozenset({"href"}),
+            "img": frozenset({"src", "alt"}),
+            "td": frozenset({"colspan", "rowspan"}),
+            "th": frozenset({"colspan", "rowspan"}),
+        }
+    )
+    formats: tuple[str, ...] = ()
+
+    def __post_init__(self):
+        for fmt in self.formats:
+            if fmt not in DESCRIPTION_FORMATS:
+                raise ValueError(f"Unknown description format: {fmt}")
+
+    def transform(self, job: Job) -> Job:
+        """Return the job with a cleaned description and requested formats."""
+        if not job.description:
+            return job
+
+        root = self._run(job.description)
+        changes = {}
+        if self.minify_html:
+            changes["description"] = "".join(root.html).strip()
+        if "text" in self.formats:
+            changes["description_text"] = _tidy_lines("".join(root.text))
+        if "markdown" in self.formats:
+            changes["description_markdown"] = _tidy_lines("".join(root.markdown))
+        return replace(job, **changes)
+
+    def minify(self, description: str) -> str:
+        return "".join(self._run(description).html).strip()
+
+    def _run(self, description: str) -> _Frame:
+        parser = etree.HTMLParser(target=_StreamTarget(self), remove_comments=True)
+        parser.feed(description)
+        return parser.close()
+
+    def _format_attrs(self, tag: str, attrib) -> str:
+        if self.strip_attributes:
+            keep = self.keep_attributes.get(tag, frozenset())
+            items = [(k, v) for k, v in attrib.items() if k in keep]
+        else:
+            items = list(attrib.items())
+        return "".join(f' {k}="{html.escape(v, quote=True)}"' for k, v in items)
+
+
+def _tidy_lines(text: str) -> str:
+    """Trim each line and collapse runs of blank lines."""
+    lines = [line.strip() for line in text.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
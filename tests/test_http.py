@@ -0,0 +1,50 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from avature_scraper.http import connection_stats, create_session, fetch, transfer_stats
+
+
+class _ErrorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so connections can be reused
+
+    def do_GET(self):
+        body = b"server error"
+        self.send_response(500)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StreamedErrorTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _ErrorHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.netloc = f"127.0.0.1:{self.server.server_port}"
+        self.url = f"http://{self.netloc}/careers/JobDetail/Job/1"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_streamed_500_returns_connection_to_pool(self):
+        session = create_session(pool_size=1)
+        opened = connection_stats.per_host().get("127.0.0.1", (0, 0.0))[0]
+        responses = transfer_stats.by("host").get(self.netloc, (0, 0, 0))[0]
+
+        for _ in range(3):
+            with self.assertRaises(requests.HTTPError):
+                fetch(session, self.url, stream=True)
+
+        # One keep-alive connection served all three requests
+        self.assertEqual(connection_stats.per_host()["127.0.0.1"][0] - opened, 1)
+        self.assertEqual(transfer_stats.by("host")[self.netloc][0] - responses, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()